@@ -1,22 +1,46 @@
 # backend/app.py
-from flask import Flask, jsonify, request, g, send_from_directory
+from flask import Flask, Request, Response, jsonify, request, g
 from flask_cors import CORS
+from sqlalchemy import bindparam, func, insert, or_, text, tuple_
+from sqlalchemy.orm import joinedload, load_only
 from datetime import datetime
 import os
+import sys
 import logging
 import json
-
-from .models import init_db, SessionLocal, User, Channel, Message, Unit, InfoCard, PushSubscription
-from .auth import hash_password, verify_password, create_token, require_auth, require_admin
-from .email_service import send_bulk_channel_notification
+import csv
+import base64
+import html
+import re
+import io
+import time
+import hashlib
+import functools
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .models import init_db, SessionLocal, ReadSessionLocal, User, Channel, Message, Unit, InfoCard, PushSubscription, DataVersion, NotificationJob
+from .auth import (
+    hash_password, hash_passwords, verify_password, password_needs_rehash, create_token, create_stream_token,
+    require_auth, require_admin, require_stream_auth, principal_cache,
+    PasswordHasherBusy, PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
+from .email_service import send_bulk_channel_notification, is_email_configured
+from . import jobs, images, maintenance
+from .realtime import MessageHub
+from .channel_cache import ChannelCache
+from .static_files import StaticFiles, IMMUTABLE, REVALIDATE
+from .write_batch import write_batcher, WriteTimeout, WRITE_RETRY_AFTER_SECONDS
 
 # Push notification imports
 try:
     from pywebpush import webpush, WebPushException
+    from py_vapid import Vapid02
+    import requests
     from cryptography.hazmat.primitives.asymmetric import ec
     from cryptography.hazmat.backends import default_backend
     from cryptography.hazmat.primitives import serialization
-    import base64
     PUSH_ENABLED = True
 except ImportError as e:
     PUSH_ENABLED = False
@@ -30,10 +54,19 @@ VAPID_EMAIL = "mailto:vahc.jamboree@gmail.com"
 VAPID_PRIVATE_KEY_FILE = "/data/vapid_private.pem"
 VAPID_PRIVATE_KEY = None
 VAPID_PUBLIC_KEY_BASE64 = None
+VAPID_SIGNER = None
+
+# Signed VAPID Authorization headers, one per push service origin. Push
+# services accept a token for up to 24h; we sign for 12h and re-sign a few
+# minutes before expiry.
+VAPID_TOKEN_LIFETIME_SECONDS = 12 * 60 * 60
+VAPID_TOKEN_REFRESH_MARGIN_SECONDS = 10 * 60
+_vapid_header_cache = {}  # origin -> (headers, expires_at)
+_vapid_header_lock = threading.Lock()
 
 def init_vapid():
     """Initialize VAPID keys - load from file or generate new ones"""
-    global VAPID_PRIVATE_KEY, VAPID_PUBLIC_KEY_BASE64, PUSH_ENABLED
+    global VAPID_PRIVATE_KEY, VAPID_PUBLIC_KEY_BASE64, VAPID_SIGNER, PUSH_ENABLED
     
     if not PUSH_ENABLED:
         return
@@ -69,6 +102,11 @@ def init_vapid():
         public_bytes = b'\x04' + x_bytes + y_bytes
         VAPID_PUBLIC_KEY_BASE64 = base64.urlsafe_b64encode(public_bytes).decode('utf-8').rstrip('=')
         
+        # Sign with the key already in memory rather than re-reading the PEM per push
+        VAPID_SIGNER = Vapid02(private_key=VAPID_PRIVATE_KEY)
+        with _vapid_header_lock:
+            _vapid_header_cache.clear()
+        
         logger.info(f"VAPID public key ready: {VAPID_PUBLIC_KEY_BASE64[:30]}...")
         
     except Exception as e:
@@ -77,7 +115,10 @@ def init_vapid():
         traceback.print_exc()
         PUSH_ENABLED = False
 
-app = Flask(__name__, static_folder='../static', static_url_path='')
+# Static files are served by serve_index/serve_static below rather than
+# Flask's built-in static route, which would shadow the SPA fallback
+STATIC_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'static'))
+app = Flask(__name__, static_folder=None)
 CORS(app, origins=["*"])
 
 with app.app_context():
@@ -89,20 +130,75 @@ with app.app_context():
 # STATIC FILES & HEALTH
 # ==========================================
 
+static_files = StaticFiles(STATIC_FOLDER)
+
 @app.route('/')
 def serve_index():
-    return send_from_directory(app.static_folder, 'index.html')
+    index = static_files.resolve('index.html')
+    if not index:
+        return jsonify({"error": "Frontend not built"}), 404
+    return static_files.send(index, REVALIDATE)
 
 @app.route('/<path:path>')
 def serve_static(path):
-    if os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
-    return send_from_directory(app.static_folder, 'index.html')
+    # Vite's /assets/ files have content hashes in their names, so they never change
+    file = static_files.resolve(path)
+    if file:
+        return static_files.send(file, IMMUTABLE if path.startswith('assets/') else REVALIDATE)
+    if path.startswith('assets/'):
+        return jsonify({"error": "Not found"}), 404
+    return serve_index()
 
 @app.route('/health')
 def health_check():
     return jsonify({"status": "healthy", "timestamp": datetime.utcnow().isoformat()})
 
+@app.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(e):
+    response = jsonify({"error": "Server is busy, please try again in a moment"})
+    response.headers['Retry-After'] = str(PASSWORD_HASH_RETRY_AFTER_SECONDS)
+    return response, 503
+
+@app.errorhandler(WriteTimeout)
+def write_timeout(e):
+    # The write was dropped before it ran, so sending it again can't duplicate it
+    response = jsonify({"error": "Server is busy, please try again in a moment"})
+    response.headers['Retry-After'] = str(WRITE_RETRY_AFTER_SECONDS)
+    return response, 503
+
+
+# ==========================================
+# CONDITIONAL RESPONSES (ETag / If-None-Match)
+# ==========================================
+
+def get_data_versions(db, *keys):
+    """Current data_versions counters for keys (0 if never bumped)"""
+    versions = dict(db.query(DataVersion.key, DataVersion.version).filter(DataVersion.key.in_(keys)).all())
+    return {k: versions.get(k, 0) for k in keys}
+
+
+def compute_etag(versions):
+    """ETag from the data_versions counters behind a response, the requesting user and the query string"""
+    raw = "|".join([g.user_id or "", request.full_path] + [f"{k}={v}" for k, v in sorted(versions.items())])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def not_modified(etag):
+    """304 for a client whose cached copy matches etag, else None"""
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return None
+
+
+def conditional_json(data, etag):
+    response = jsonify(data)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 
 # ==========================================
 # AUTHENTICATION
@@ -117,7 +213,7 @@ def login():
     if not login_id or not password:
         return jsonify({"error": "Username/email and password required"}), 400
     
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
         user = db.query(User).filter(User.username == login_id).first()
         if not user:
@@ -127,40 +223,55 @@ def login():
             return jsonify({"error": "No account found"}), 401
         if not user.active:
             return jsonify({"error": "Account is disabled"}), 401
-        if not verify_password(password, user.password_hash):
-            return jsonify({"error": "Incorrect password"}), 401
         
-        token = create_token(user.id, user.role)
-        
-        return jsonify({
-            "token": token,
-            "user": {
-                "id": user.id,
-                "username": user.username,
-                "firstName": user.first_name,
-                "lastName": user.last_name,
-                "name": user.name,
-                "email": user.email,
-                "phone": user.phone,
-                "age": user.age,
-                "gender": user.gender,
-                "role": user.role,
-                "position": user.position,
-                "unit": user.unit,
-                "patrol": user.patrol,
-                "emergencyContactName": user.emergency_contact_name,
-                "emergencyContactPhone": user.emergency_contact_phone,
-                "emailNotifications": user.email_notifications
-            }
-        })
+        user_id, role, password_hash = user.id, user.role, user.password_hash
+        profile = {
+            "id": user.id,
+            "username": user.username,
+            "firstName": user.first_name,
+            "lastName": user.last_name,
+            "name": user.name,
+            "email": user.email,
+            "phone": user.phone,
+            "age": user.age,
+            "gender": user.gender,
+            "role": user.role,
+            "position": user.position,
+            "unit": user.unit,
+            "patrol": user.patrol,
+            "emergencyContactName": user.emergency_contact_name,
+            "emergencyContactPhone": user.emergency_contact_phone,
+            "emailNotifications": user.email_notifications
+        }
     finally:
+        # Give the connection back before bcrypt, which takes far longer than the query
         db.close()
+    
+    if not verify_password(password, password_hash):
+        return jsonify({"error": "Incorrect password"}), 401
+    
+    # Upgrade hashes made with an older BCRYPT_ROUNDS while we have the password
+    if password_needs_rehash(password_hash):
+        new_hash = hash_password(password)
+        write_db = SessionLocal()
+        try:
+            write_db.query(User).filter(User.id == user_id).update({User.password_hash: new_hash})
+            write_db.commit()
+        finally:
+            write_db.close()
+    
+    token = create_token(user_id, role)
+    
+    return jsonify({
+        "token": token,
+        "user": profile
+    })
 
 
 @app.route('/api/auth/me', methods=['GET'])
 @require_auth
 def get_current_user():
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
         user = db.query(User).filter(User.id == g.user_id).first()
         if not user:
@@ -200,14 +311,23 @@ def change_password():
     if len(new_password) < 8:
         return jsonify({"error": "Password must be at least 8 characters"}), 400
     
+    db = ReadSessionLocal()
+    try:
+        password_hash = db.query(User.password_hash).filter(User.id == g.user_id).scalar()
+    finally:
+        db.close()
+    
+    # Both hashes run with no connection checked out; only the update needs one
+    if not verify_password(current_password, password_hash):
+        return jsonify({"error": "Current password is incorrect"}), 401
+    new_hash = hash_password(new_password)
+    
     db = SessionLocal()
     try:
-        user = db.query(User).filter(User.id == g.user_id).first()
-        if not verify_password(current_password, user.password_hash):
-            return jsonify({"error": "Current password is incorrect"}), 401
-        
-        user.password_hash = hash_password(new_password)
-        user.password_changed = True
+        db.query(User).filter(User.id == g.user_id).update({
+            User.password_hash: new_hash,
+            User.password_changed: True
+        })
         db.commit()
         return jsonify({"message": "Password changed successfully"})
     finally:
@@ -218,20 +338,41 @@ def change_password():
 # CHANNELS
 # ==========================================
 
+channel_cache = ChannelCache()
+
+
+def user_can_view_channel(user, channel):
+    """channel is a ChannelInfo from channel_cache"""
+    if user.role == 'admin':
+        return True
+    if user.role not in channel.allowed_roles:
+        return False
+    if channel.type == 'unit' and channel.unit != user.unit:
+        return False
+    return True
+
+
+def user_can_post_in_channel(user, channel):
+    return user.role == 'admin' or user.role in channel.can_post_roles
+
+
 @app.route('/api/channels', methods=['GET'])
 @require_auth
 def get_channels():
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
-        user = db.query(User).filter(User.id == g.user_id).first()
-        channels = db.query(Channel).filter(Channel.active == True).all()
+        versions = get_data_versions(db, 'channels', 'users')
+        etag = compute_etag(versions)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        user = g.user
+        channels = channel_cache.all(db, versions['channels']).values()
         
         accessible = []
         for channel in channels:
-            allowed_roles = channel.allowed_roles.split(',')
-            if user.role != 'admin' and user.role not in allowed_roles:
-                continue
-            if channel.type == 'unit' and channel.unit != user.unit and user.role != 'admin':
+            if not channel.active or not user_can_view_channel(user, channel):
                 continue
             
             channel_data = {
@@ -241,17 +382,18 @@ def get_channels():
                 "icon": channel.icon,
                 "type": channel.type,
                 "unit": channel.unit,
-                "canPost": user.role in channel.can_post_roles.split(',') or user.role == 'admin'
+                "canPost": user_can_post_in_channel(user, channel)
             }
             
             # Include notification settings for admins
             if user.role == 'admin':
-                channel_data["emailNotifications"] = channel.email_notifications if hasattr(channel, 'email_notifications') else False
-                channel_data["pushNotifications"] = channel.push_notifications if hasattr(channel, 'push_notifications') else True
+                channel_data["emailNotifications"] = channel.email_notifications
+                channel_data["pushNotifications"] = channel.push_notifications
+                channel_data["retentionDays"] = channel.retention_days
             
             accessible.append(channel_data)
         
-        return jsonify(accessible)
+        return conditional_json(accessible, etag)
     finally:
         db.close()
 
@@ -278,14 +420,21 @@ def update_channel(channel_id):
             channel.description = data['description']
         if 'icon' in data:
             channel.icon = data['icon']
+        if 'retentionDays' in data:
+            days = data['retentionDays']
+            if days is not None and (not isinstance(days, int) or isinstance(days, bool) or days < 1):
+                return jsonify({"error": "retentionDays must be a positive whole number of days, or null to keep everything"}), 400
+            channel.retention_days = days
         
         db.commit()
+        channel_cache.invalidate()
         
         return jsonify({
             "id": channel.id,
             "name": channel.name,
             "emailNotifications": channel.email_notifications,
             "pushNotifications": channel.push_notifications,
+            "retentionDays": channel.retention_days,
             "message": "Channel updated"
         })
     finally:
@@ -296,46 +445,347 @@ def update_channel(channel_id):
 # MESSAGES
 # ==========================================
 
+MESSAGE_PAGE_DEFAULT = 50
+MESSAGE_PAGE_MAX = 200
+
+
+def message_to_dict(msg, author):
+    return {
+        "id": msg.id,
+        "content": msg.content,
+        "imageUrl": msg.image_url,
+        "thumbnailUrl": thumbnail_url(msg.image_url),
+        "pinned": msg.pinned,
+        "createdAt": msg.created_at.isoformat(),
+        "author": {
+            "id": author.id if author else None,
+            "name": author.name if author else "Unknown",
+            "role": author.role if author else None
+        }
+    }
+
 @app.route('/api/channels/<channel_id>/messages', methods=['GET'])
 @require_auth
 def get_messages(channel_id):
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
-        user = db.query(User).filter(User.id == g.user_id).first()
-        channel = db.query(Channel).filter(Channel.id == channel_id).first()
+        # Access depends on the channel and user rows, so their versions are
+        # part of the tag as well
+        versions = get_data_versions(db, f'messages:{channel_id}', 'channels', 'users')
+        etag = compute_etag(versions)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        user = g.user
+        channel = channel_cache.get(db, channel_id, versions['channels'])
         
         if not channel:
             return jsonify({"error": "Channel not found"}), 404
         
-        allowed_roles = channel.allowed_roles.split(',')
-        if user.role not in allowed_roles and user.role != 'admin':
-            return jsonify({"error": "Access denied"}), 403
-        if channel.type == 'unit' and channel.unit != user.unit and user.role != 'admin':
+        if not user_can_view_channel(user, channel):
             return jsonify({"error": "Access denied"}), 403
         
-        messages = db.query(Message).filter(Message.channel_id == channel_id).order_by(Message.created_at.asc()).all()
-        
-        result = []
-        for msg in messages:
-            author = db.query(User).filter(User.id == msg.user_id).first()
-            result.append({
-                "id": msg.id,
-                "content": msg.content,
-                "imageUrl": msg.image_url,
-                "pinned": msg.pinned,
-                "createdAt": msg.created_at.isoformat(),
-                "author": {
-                    "id": author.id if author else None,
-                    "name": author.name if author else "Unknown",
-                    "role": author.role if author else None
-                }
-            })
+        # Cursor paging: since_id returns messages newer than a known id (used
+        # for polling), before_id pages back through history. Both are keyset
+        # scans on idx_messages_channel_created via (created_at, id).
+        since_id = request.args.get('since_id', type=int)
+        before_id = request.args.get('before_id', type=int)
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, MESSAGE_PAGE_MAX))
+        elif since_id is not None or before_id is not None:
+            limit = MESSAGE_PAGE_DEFAULT
         
-        return jsonify(result)
+        # Authors are loaded in the same SELECT rather than one query per message
+        query = db.query(Message).options(joinedload(Message.author)).filter(Message.channel_id == channel_id)
+        cursor_id = since_id if since_id is not None else before_id
+        anchor = None
+        if cursor_id is not None:
+            anchor = db.query(Message.created_at).filter(
+                Message.id == cursor_id, Message.channel_id == channel_id
+            ).first()
+        
+        if since_id is not None:
+            if anchor:
+                query = query.filter(tuple_(Message.created_at, Message.id) > (anchor.created_at, since_id))
+            else:
+                query = query.filter(Message.id > since_id)
+            messages = query.order_by(Message.created_at.asc(), Message.id.asc()).limit(limit).all()
+        elif before_id is not None or limit is not None:
+            if before_id is not None:
+                if anchor:
+                    query = query.filter(tuple_(Message.created_at, Message.id) < (anchor.created_at, before_id))
+                else:
+                    query = query.filter(Message.id < before_id)
+            messages = query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit).all()
+            messages.reverse()
+        else:
+            messages = query.order_by(Message.created_at.asc(), Message.id.asc()).all()
+        
+        return conditional_json([message_to_dict(msg, msg.author) for msg in messages], etag)
     finally:
         db.close()
 
 
+# ==========================================
+# SEARCH
+# ==========================================
+
+SEARCH_LIMIT_DEFAULT = 20
+SEARCH_LIMIT_MAX = 100
+SEARCH_SNIPPET_TOKENS = 12
+# Only the newest N matches are ranked. bm25 over every match of a common
+# word costs tens of ms at 100k messages; in a chat the recent ones are the
+# useful ones anyway.
+SEARCH_RANK_WINDOW = 1000
+
+# snippet() brackets hits with these, so the text can be HTML-escaped before
+# they become <mark> tags
+_HIT_START, _HIT_END = '\x02', '\x03'
+
+SEARCH_WINDOW_SQL = text("""
+    SELECT messages_fts.rowid
+    FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+    WHERE messages_fts MATCH :query AND m.channel_id IN :channel_ids
+    ORDER BY messages_fts.rowid DESC
+    LIMIT 1 OFFSET :offset
+""").bindparams(bindparam('channel_ids', expanding=True))
+
+SEARCH_SQL = text(f"""
+    SELECT m.id, snippet(messages_fts, 0, '{_HIT_START}', '{_HIT_END}', '…', {SEARCH_SNIPPET_TOKENS}) AS snippet
+    FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid
+    WHERE messages_fts MATCH :query AND messages_fts.rowid >= :min_id AND m.channel_id IN :channel_ids
+    ORDER BY rank
+    LIMIT :limit
+""").bindparams(bindparam('channel_ids', expanding=True))
+
+
+# Archived text is compressed outside the index, so snippet() can't read it
+ARCHIVE_SEARCH_SQL = text("""
+    SELECT message_archive.message_id AS id
+    FROM message_archive_fts JOIN message_archive ON message_archive.message_id = message_archive_fts.rowid
+    WHERE message_archive_fts MATCH :query AND message_archive.channel_id IN :channel_ids
+    ORDER BY rank
+    LIMIT :limit
+""").bindparams(bindparam('channel_ids', expanding=True))
+
+
+def fts_query(q):
+    """User input as an FTS5 query: every word must appear, the last may be a prefix"""
+    terms = ['"' + t.replace('"', '""') + '"' for t in q.split()]
+    if not terms:
+        return None
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def highlight(snippet):
+    return html.escape(snippet).replace(_HIT_START, '<mark>').replace(_HIT_END, '</mark>')
+
+
+def archive_snippet(content, q):
+    """snippet() for archived text: a window of words around the first hit, hits bracketed"""
+    hit = re.compile(r'\b(?:' + '|'.join(re.escape(t) for t in q.split()) + r')\w*', re.IGNORECASE)
+    words = content.split()
+    first = next((i for i, word in enumerate(words) if hit.search(word)), 0)
+    start = max(0, first - SEARCH_SNIPPET_TOKENS // 2)
+    end = start + SEARCH_SNIPPET_TOKENS
+    window = hit.sub(lambda m: _HIT_START + m.group(0) + _HIT_END, ' '.join(words[start:end]))
+    return ('…' if start else '') + window + ('…' if end < len(words) else '')
+
+
+def search_archive(db, q, query, channels, channel_ids, limit):
+    ids = [row.id for row in db.execute(ARCHIVE_SEARCH_SQL, {"query": query, "channel_ids": channel_ids, "limit": limit})]
+    archived = maintenance.load_archived(db, ids)
+    authors = {u.id: u for u in db.query(User).filter(User.id.in_({m["userId"] for m in archived.values()}))}
+    
+    results = []
+    for message_id in ids:
+        message = archived.get(message_id)
+        if not message:
+            continue
+        author = authors.get(message["userId"])
+        results.append({
+            "id": message["id"],
+            "content": message["content"],
+            "imageUrl": message["imageUrl"],
+            "thumbnailUrl": thumbnail_url(message["imageUrl"]),
+            "pinned": False,
+            "createdAt": message["createdAt"],
+            "author": {
+                "id": author.id if author else None,
+                "name": author.name if author else "Unknown",
+                "role": author.role if author else None
+            },
+            "channelId": message["channelId"],
+            "channelName": channels[message["channelId"]].name,
+            "snippet": highlight(archive_snippet(message["content"], q)),
+            "archived": True
+        })
+    return results
+
+
+@app.route('/api/search', methods=['GET'])
+@require_auth
+def search_messages():
+    """Ranked full-text search over messages (or, with archived=1, the archive) in channels the user can view"""
+    q = request.args.get('q', '')
+    query = fts_query(q)
+    if not query:
+        return jsonify({"error": "Search query required"}), 400
+    limit = request.args.get('limit', SEARCH_LIMIT_DEFAULT, type=int)
+    limit = max(1, min(limit, SEARCH_LIMIT_MAX))
+    
+    db = ReadSessionLocal()
+    try:
+        user = g.user
+        channels = {
+            c.id: c for c in channel_cache.all(db).values()
+            if c.active and user_can_view_channel(user, c)
+        }
+        channel_id = request.args.get('channel_id')
+        if channel_id:
+            if channel_id not in channels:
+                return jsonify({"error": "Access denied"}), 403
+            channel_ids = [channel_id]
+        else:
+            channel_ids = list(channels)
+        if not channel_ids:
+            return jsonify([])
+        if request.args.get('archived') in ('1', 'true'):
+            return jsonify(search_archive(db, q, query, channels, channel_ids, limit))
+        
+        params = {"query": query, "channel_ids": channel_ids}
+        min_id = db.execute(SEARCH_WINDOW_SQL, dict(params, offset=SEARCH_RANK_WINDOW - 1)).scalar() or 0
+        hits = db.execute(SEARCH_SQL, dict(params, min_id=min_id, limit=limit)).all()
+        messages = {
+            m.id: m for m in db.query(Message).options(joinedload(Message.author))
+            .filter(Message.id.in_([hit.id for hit in hits]))
+        } if hits else {}
+        
+        results = []
+        for hit in hits:
+            message = messages.get(hit.id)
+            if not message:
+                continue
+            result = message_to_dict(message, message.author)
+            result["channelId"] = message.channel_id
+            result["channelName"] = channels[message.channel_id].name
+            result["snippet"] = highlight(hit.snippet)
+            results.append(result)
+        return jsonify(results)
+    finally:
+        db.close()
+
+
+# ==========================================
+# MESSAGE STREAM (Server-Sent Events)
+# ==========================================
+
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_MAX_SECONDS = 300  # clients reconnect with Last-Event-ID after this
+STREAM_RETRY_MS = 3000
+
+# An open stream holds a gthread worker thread for up to STREAM_MAX_SECONDS.
+# Only part of each worker's pool may stream, so idle phones can't take every
+# thread from the API; streams over the cap get a 503, and the client polls.
+STREAM_RESERVED_THREADS = 16
+STREAMS_PER_WORKER = int(os.getenv(
+    "STREAMS_PER_WORKER",
+    str(max(1, int(os.getenv("GUNICORN_THREADS", "50")) - STREAM_RESERVED_THREADS))
+))
+STREAM_BUSY_RETRY_AFTER_SECONDS = 60
+stream_slots = threading.BoundedSemaphore(STREAMS_PER_WORKER)
+
+message_hub = MessageHub(serialize=message_to_dict)
+
+
+def sse_event(message_dict):
+    return f"id: {message_dict['id']}\nevent: message\ndata: {json.dumps(message_dict)}\n\n"
+
+
+@app.route('/api/channels/<channel_id>/stream-token', methods=['POST'])
+@require_auth
+def get_stream_token(channel_id):
+    """Token for opening this channel's stream, so the session token stays out of URLs"""
+    return jsonify({"token": create_stream_token(g.user_id, channel_id)})
+
+
+@app.route('/api/channels/<channel_id>/stream', methods=['GET'])
+@require_stream_auth
+def stream_messages(channel_id):
+    """Push new messages in a channel as they are posted"""
+    db = ReadSessionLocal()
+    try:
+        user = g.user
+        channel = channel_cache.get(db, channel_id)
+        
+        if not channel:
+            return jsonify({"error": "Channel not found"}), 404
+        if not user_can_view_channel(user, channel):
+            return jsonify({"error": "Access denied"}), 403
+    finally:
+        db.close()
+    
+    if not stream_slots.acquire(blocking=False):
+        response = jsonify({"error": "Too many open streams, poll instead"})
+        response.headers['Retry-After'] = str(STREAM_BUSY_RETRY_AFTER_SECONDS)
+        return response, 503
+    
+    # EventSource sends Last-Event-ID on reconnect; since_id covers the first connect
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    if last_id is None:
+        last_id = request.args.get('since_id', type=int)
+    
+    def generate():
+        nonlocal last_id
+        subscription = message_hub.subscribe(channel_id)
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            
+            # Catch up on anything committed before we subscribed
+            while last_id is not None:
+                db = ReadSessionLocal()
+                try:
+                    missed = db.query(Message).options(joinedload(Message.author)).filter(
+                        Message.channel_id == channel_id, Message.id > last_id
+                    ).order_by(Message.id.asc()).limit(MESSAGE_PAGE_MAX).all()
+                    events = [message_to_dict(msg, msg.author) for msg in missed]
+                finally:
+                    db.close()
+                for event in events:
+                    last_id = event["id"]
+                    yield sse_event(event)
+                if len(events) < MESSAGE_PAGE_MAX:
+                    break
+            
+            deadline = time.monotonic() + STREAM_MAX_SECONDS
+            while time.monotonic() < deadline and not subscription.overflowed:
+                event = subscription.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                if last_id is not None and event["id"] <= last_id:
+                    continue
+                last_id = event["id"]
+                yield sse_event(event)
+            # The stream token has expired by now, so EventSource's own retry
+            # would be refused; tell the client to reconnect with a new one
+            yield "event: reconnect\ndata: {}\n\n"
+        finally:
+            message_hub.unsubscribe(subscription)
+    
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Released when the server closes the response, even if the client left
+    # before the generator ever ran
+    response.call_on_close(stream_slots.release)
+    return response
+
+
 @app.route('/api/channels/<channel_id>/messages', methods=['POST'])
 @require_auth
 def post_message(channel_id):
@@ -346,18 +796,20 @@ def post_message(channel_id):
     if not content and not image_url:
         return jsonify({"error": "Message content or image required"}), 400
     
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
-        user = db.query(User).filter(User.id == g.user_id).first()
-        channel = db.query(Channel).filter(Channel.id == channel_id).first()
-        
-        if not channel:
-            return jsonify({"error": "Channel not found"}), 404
-        
-        can_post_roles = channel.can_post_roles.split(',')
-        if user.role not in can_post_roles and user.role != 'admin':
-            return jsonify({"error": "You cannot post in this channel"}), 403
-        
+        user = g.user
+        channel = channel_cache.get(db, channel_id)
+    finally:
+        db.close()
+    
+    if not channel:
+        return jsonify({"error": "Channel not found"}), 404
+    
+    if not user_can_post_in_channel(user, channel):
+        return jsonify({"error": "You cannot post in this channel"}), 403
+    
+    def write(db):
         message = Message(
             channel_id=channel_id, 
             user_id=user.id, 
@@ -365,52 +817,91 @@ def post_message(channel_id):
             image_url=image_url
         )
         db.add(message)
-        db.commit()
-        db.refresh(message)
         
-        # Send email notifications (only if enabled for this channel)
+        # Notifications are queued in the same transaction and delivered by
+        # the background job worker, so the poster doesn't wait on SMTP/push
         if channel.email_notifications:
-            try:
-                recipients = get_channel_notification_recipients(db, channel, user)
-                if recipients:
-                    send_bulk_channel_notification(recipients=recipients, channel_name=channel.name, sender_name=user.name, message_preview=content or "[Photo]")
-            except Exception as e:
-                logger.error(f"Error sending email notifications: {e}")
-        
-        # Send push notifications (only if enabled for this channel)
+            jobs.enqueue(db, "channel_email", {
+                "channel_id": channel_id,
+                "sender_id": user.id,
+                "message_preview": content or "[Photo]"
+            })
         if channel.push_notifications:
-            try:
-                preview = content[:100] + "..." if len(content) > 100 else (content or "📷 Photo")
-                send_push_notification(
-                    title=f"#{channel.name}",
-                    body=f"{user.first_name or user.name}: {preview}",
-                    url=f"/?channel={channel_id}",
-                    exclude_user_id=user.id
-                )
-            except Exception as e:
-                logger.error(f"Error sending push notifications: {e}")
+            preview = content[:100] + "..." if len(content) > 100 else (content or "📷 Photo")
+            jobs.enqueue(db, "push", {
+                "title": f"#{channel.name}",
+                "body": f"{user.first_name or user.name}: {preview}",
+                "url": f"/?channel={channel_id}",
+                "exclude_user_id": user.id
+            })
         
-        return jsonify({
-            "id": message.id,
-            "content": message.content,
-            "imageUrl": message.image_url,
-            "pinned": message.pinned,
-            "createdAt": message.created_at.isoformat(),
-            "author": {"id": user.id, "name": user.name, "role": user.role}
-        }), 201
-    finally:
-        db.close()
+        db.flush()
+        return message_to_dict(message, user)
+    
+    # Committed together with any other posts arriving in the same few ms
+    message = write_batcher.submit(write)
+    message_hub.notify()
+    jobs.wake()
+    
+    return jsonify(message), 201
 
 
 import uuid
+import tempfile
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 
 UPLOAD_FOLDER = '/data/uploads'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_INCOMING_FOLDER = os.path.join(UPLOAD_FOLDER, 'incoming')
+
+# Bodies past this are refused from Content-Length before any of it is read
+# (or as soon as a chunked body crosses it); the slack covers multipart framing
+app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE + 64 * 1024
+
+
+class UploadRequest(Request):
+    """
+    Streams multipart file parts in chunks to a temp file in the incoming
+    folder on the /data volume, so memory stays flat and the finished file
+    can be renamed into place atomically. Whatever is left of it is removed
+    at teardown.
+    """
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        os.makedirs(UPLOAD_INCOMING_FOLDER, exist_ok=True)
+        stream = tempfile.NamedTemporaryFile(dir=UPLOAD_INCOMING_FOLDER, prefix='part-', delete=False)
+        self.__dict__.setdefault('upload_temp_paths', []).append(stream.name)
+        return stream
+
+
+app.request_class = UploadRequest
+
+
+@app.teardown_request
+def remove_upload_temp_files(exc):
+    for path in getattr(request, 'upload_temp_paths', ()):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    return jsonify({"error": "File too large. Maximum 10MB."}), 413
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def sniff_image_type(head):
+    """Image type from a file's first bytes, or None if it isn't one we accept"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
 
 
 @app.route('/api/upload', methods=['POST'])
@@ -424,9 +915,6 @@ def upload_image():
     if file.filename == '':
         return jsonify({"error": "No file selected"}), 400
     
-    if not allowed_file(file.filename):
-        return jsonify({"error": "File type not allowed. Use PNG, JPG, GIF, or WebP."}), 400
-    
     # Check file size
     file.seek(0, 2)  # Seek to end
     size = file.tell()
@@ -435,47 +923,110 @@ def upload_image():
     if size > MAX_FILE_SIZE:
         return jsonify({"error": "File too large. Maximum 10MB."}), 400
     
+    # Trust the bytes, not the file name
+    ext = sniff_image_type(file.stream.read(16))
+    if not ext:
+        return jsonify({"error": "File type not allowed. Use PNG, JPG, GIF, or WebP."}), 400
+    file.stream.flush()
+    
+    stem = uuid.uuid4().hex
     try:
         # Ensure upload directory exists
         os.makedirs(UPLOAD_FOLDER, exist_ok=True)
         
-        # Generate unique filename
-        ext = file.filename.rsplit('.', 1)[1].lower()
-        filename = f"{uuid.uuid4().hex}.{ext}"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
+        # The part was streamed to a temp file on the same volume as the
+        # uploads folder; it's renamed (or rendered) from there, never copied
+        incoming = file.stream.name
         
-        file.save(filepath)
+        if not images.IMAGE_PROCESSING_ENABLED:
+            filename = f"{stem}.{ext}"
+            os.replace(incoming, os.path.join(UPLOAD_FOLDER, filename))
+            return jsonify({"url": f"/uploads/{filename}", "thumbnailUrl": None})
         
-        # Return URL path
-        image_url = f"/uploads/{filename}"
+        # The temp file (with its EXIF) sits where /uploads/ can't reach it
+        # and is deleted once the renditions are written
+        try:
+            display, thumb, width, height = images.process_upload(incoming, UPLOAD_FOLDER, stem)
+        except ValueError:
+            return jsonify({"error": "File is not a valid image"}), 400
+        except images.ImageWorkerUnavailable as e:
+            logger.error(f"Image processing unavailable: {e}")
+            return jsonify({"error": "Image processing is busy, please try again"}), 503
         
-        return jsonify({"url": image_url})
+        return jsonify({
+            "url": f"/uploads/{display}",
+            "thumbnailUrl": f"/uploads/{thumb}",
+            "width": width,
+            "height": height
+        })
     except Exception as e:
         logger.error(f"Upload failed: {e}")
         return jsonify({"error": "Upload failed"}), 500
 
 
+@functools.lru_cache(maxsize=4096)
+def thumbnail_url(image_url):
+    """Thumbnail for an uploaded image, or None for uploads made before renditions existed"""
+    if not image_url or not image_url.startswith('/uploads/'):
+        return None
+    thumb = images.thumbnail_name(image_url[len('/uploads/'):])
+    if not os.path.exists(os.path.join(UPLOAD_FOLDER, thumb)):
+        return None
+    return f"/uploads/{thumb}"
+
+
+upload_files = StaticFiles(UPLOAD_FOLDER, cache_misses=False)
+
 @app.route('/uploads/<filename>')
 def serve_upload(filename):
-    """Serve uploaded files"""
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    """Serve uploaded files; each is written once under a new uuid"""
+    file = upload_files.resolve(filename)
+    if not file:
+        return jsonify({"error": "Not found"}), 404
+    return upload_files.send(file, IMMUTABLE)
 
 
 def get_channel_notification_recipients(db, channel, sender):
-    allowed_roles = channel.allowed_roles.split(',')
-    query = db.query(User).filter(User.active == True, User.email_notifications == True, User.id != sender.id, User.role.in_(allowed_roles))
+    query = db.query(User).filter(User.active == True, User.email_notifications == True, User.id != sender.id, User.role.in_(list(channel.allowed_roles)))
     if channel.type == 'unit' and channel.unit:
         query = query.filter(User.unit == channel.unit)
     users = query.all()
     return [{"email": u.email, "name": u.name} for u in users]
 
 
+def run_channel_email_job(payload):
+    """Job handler: email channel members about a new message"""
+    if not is_email_configured():
+        logger.warning("GMAIL_APP_PASSWORD not set - dropping email job")
+        return
+    
+    db = ReadSessionLocal()
+    try:
+        channel = channel_cache.get(db, payload["channel_id"])
+        sender = db.query(User).filter(User.id == payload["sender_id"]).first()
+        if not channel or not sender:
+            return
+        recipients = payload.get("recipients")
+        if recipients is None:
+            recipients = get_channel_notification_recipients(db, channel, sender)
+        channel_name, sender_name = channel.name, sender.name
+    finally:
+        db.close()
+    
+    failed = send_bulk_channel_notification(recipients=recipients, channel_name=channel_name, sender_name=sender_name, message_preview=payload["message_preview"])
+    if failed:
+        raise jobs.RetryJob(f"{len(failed)} of {len(recipients)} emails failed", payload={**payload, "recipients": failed})
+
+
+jobs.register_handler("channel_email", run_channel_email_job)
+
+
 @app.route('/api/messages/<int:message_id>/pin', methods=['POST'])
 @require_auth
 def toggle_pin_message(message_id):
     db = SessionLocal()
     try:
-        user = db.query(User).filter(User.id == g.user_id).first()
+        user = g.user
         if user.role not in ['admin', 'adult_leader']:
             return jsonify({"error": "Permission denied"}), 403
         
@@ -494,36 +1045,159 @@ def toggle_pin_message(message_id):
 # ADMIN: USER MANAGEMENT
 # ==========================================
 
-def user_to_dict(u):
-    return {
-        "id": u.id,
-        "username": u.username,
-        "firstName": u.first_name,
-        "lastName": u.last_name,
-        "name": u.name,
-        "email": u.email,
-        "phone": u.phone,
-        "age": u.age,
-        "gender": u.gender,
-        "role": u.role,
-        "position": u.position,
-        "unit": u.unit,
-        "patrol": u.patrol,
-        "emergencyContactName": u.emergency_contact_name,
-        "emergencyContactPhone": u.emergency_contact_phone,
-        "active": u.active,
-        "emailNotifications": u.email_notifications,
-        "createdAt": u.created_at.isoformat() if u.created_at else None
-    }
+# API key -> User attribute, for the keys copied straight from a column
+USER_ATTRS = {
+    "id": "id",
+    "username": "username",
+    "firstName": "first_name",
+    "lastName": "last_name",
+    "email": "email",
+    "phone": "phone",
+    "age": "age",
+    "gender": "gender",
+    "role": "role",
+    "position": "position",
+    "unit": "unit",
+    "patrol": "patrol",
+    "emergencyContactName": "emergency_contact_name",
+    "emergencyContactPhone": "emergency_contact_phone",
+    "active": "active",
+    "emailNotifications": "email_notifications",
+}
+USER_FIELDS = {*USER_ATTRS, "name", "createdAt"}
+
+
+def user_to_dict(u, fields=USER_FIELDS):
+    """fields limits the keys, and the attributes read, to those asked for"""
+    d = {key: getattr(u, USER_ATTRS[key]) for key in fields if key in USER_ATTRS}
+    if "name" in fields:
+        d["name"] = u.name
+    if "createdAt" in fields:
+        d["createdAt"] = u.created_at.isoformat() if u.created_at else None
+    return d
+
+
+def user_columns(fields):
+    """Columns to load for these fields, plus the ones sorting and cursors need"""
+    names = {"id", "first_name", "last_name"}
+    names.update(USER_ATTRS[key] for key in fields if key in USER_ATTRS)
+    if "createdAt" in fields:
+        names.add("created_at")
+    return [getattr(User, name) for name in names]
+
+
+USER_PAGE_MAX = 500
+
+
+def encode_user_cursor(user):
+    key = [user.last_name.lower(), user.first_name.lower(), user.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_user_cursor(cursor):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if isinstance(key, list) and len(key) == 3 and all(isinstance(k, str) for k in key):
+            return key
+    except ValueError:
+        pass
+    raise ValueError("Invalid cursor")
+
+
+def prefix_range(column, prefix):
+    """column starts with prefix, as a range so SQLite can use an index on column"""
+    # The upper bound bumps the last character. U+10FFFF has no successor, but
+    # everything starting with prefix also sorts below the bumped character
+    # before it; a prefix made only of U+10FFFF needs no upper bound at all.
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return column >= prefix
+    bumped = ord(stem[-1]) + 1
+    if 0xD800 <= bumped <= 0xDFFF:
+        bumped = 0xE000  # surrogates can't be stored; UTF-8 order skips them
+    return (column >= prefix) & (column < stem[:-1] + chr(bumped))
 
 
 @app.route('/api/admin/users', methods=['GET'])
 @require_admin
 def get_all_users():
-    db = SessionLocal()
+    """
+    List users ordered by last/first name.
+    Filters: role (comma separated), unit, patrol, active, q (name, username
+    or email prefix). fields= limits the keys returned and the columns
+    loaded. With limit= the response is a page, {"users": [...],
+    "nextCursor": ...}; pass nextCursor back as cursor= for the next one.
+    Without it, a plain list of all matches.
+    """
+    fields = request.args.get('fields')
+    if fields:
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = set(fields) - USER_FIELDS
+        if unknown:
+            return jsonify({"error": f"Unknown fields: {', '.join(sorted(unknown))}"}), 400
+    
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    if cursor and limit is None:
+        limit = USER_PAGE_MAX
+    if limit is not None:
+        limit = max(1, min(limit, USER_PAGE_MAX))
+    
+    db = ReadSessionLocal()
     try:
-        users = db.query(User).all()
-        return jsonify([user_to_dict(u) for u in users])
+        etag = compute_etag(get_data_versions(db, 'users'))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
+        sort_key = (func.lower(User.last_name), func.lower(User.first_name), User.id)
+        query = db.query(User)
+        if fields:
+            query = query.options(load_only(*user_columns(fields)))
+        
+        role = request.args.get('role')
+        if role:
+            query = query.filter(User.role.in_(role.split(',')))
+        if request.args.get('unit'):
+            query = query.filter(User.unit == request.args['unit'])
+        if request.args.get('patrol'):
+            query = query.filter(User.patrol == request.args['patrol'])
+        active = request.args.get('active')
+        if active is not None:
+            query = query.filter(User.active == (active.lower() in ('1', 'true', 'yes')))
+        
+        # Each branch is a range over its own index (see migrations.py); emails are stored lowercase
+        q = request.args.get('q', '').strip().lower()
+        if q:
+            query = query.filter(or_(
+                prefix_range(func.lower(User.first_name), q),
+                prefix_range(func.lower(User.last_name), q),
+                prefix_range(func.lower(User.username), q),
+                prefix_range(User.email, q),
+            ))
+        
+        if cursor:
+            try:
+                after = decode_user_cursor(cursor)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            # The leading-column bound lets SQLite seek idx_users_name rather than scan it
+            query = query.filter(sort_key[0] >= after[0], tuple_(*sort_key) > tuple_(*after))
+        
+        query = query.order_by(*sort_key)
+        if limit is not None:
+            query = query.limit(limit + 1)
+        users = query.all()
+        
+        next_cursor = None
+        if limit is not None and len(users) > limit:
+            users = users[:limit]
+            next_cursor = encode_user_cursor(users[-1])
+        
+        result = [user_to_dict(u, fields or USER_FIELDS) for u in users]
+        if limit is not None:
+            result = {"users": result, "nextCursor": next_cursor}
+        return conditional_json(result, etag)
     finally:
         db.close()
 
@@ -576,6 +1250,146 @@ def create_user():
         db.close()
 
 
+USER_ROLES = {'admin', 'adult_leader', 'youth', 'parent'}
+IMPORT_MAX_ROWS = 2000
+
+# Import column -> User attribute; the same camelCase keys create_user takes
+IMPORT_FIELDS = {
+    'username': 'username',
+    'firstName': 'first_name',
+    'lastName': 'last_name',
+    'email': 'email',
+    'phone': 'phone',
+    'age': 'age',
+    'gender': 'gender',
+    'role': 'role',
+    'position': 'position',
+    'unit': 'unit',
+    'patrol': 'patrol',
+    'emergencyContactName': 'emergency_contact_name',
+    'emergencyContactPhone': 'emergency_contact_phone',
+    'password': 'password',
+}
+
+
+def read_import_rows():
+    """Rows from a JSON list, {"users": [...]}, a CSV body or an uploaded CSV file"""
+    upload = request.files.get('file')
+    if upload:
+        body = upload.read().decode('utf-8-sig')
+    elif request.mimetype in ('text/csv', 'text/plain'):
+        body = request.get_data(as_text=True)
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('users')
+        if not isinstance(data, list):
+            raise ValueError("Expected a JSON list of users or a CSV file")
+        return data
+    return list(csv.DictReader(io.StringIO(body)))
+
+
+@app.route('/api/admin/users/import', methods=['POST'])
+@require_admin
+def import_users():
+    """Create many users at once from a roster; returns a per-row report"""
+    try:
+        rows = read_import_rows()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"error": str(e)}), 400
+    if len(rows) > IMPORT_MAX_ROWS:
+        return jsonify({"error": f"At most {IMPORT_MAX_ROWS} rows per import"}), 400
+    
+    # Normalise and validate each row on its own first
+    results = []
+    candidates = []
+    for number, raw in enumerate(rows, start=1):
+        if not isinstance(raw, dict):
+            results.append({"row": number, "status": "error", "error": "Row is not an object"})
+            continue
+        row = {}
+        not_text = []
+        for key, attr in IMPORT_FIELDS.items():
+            value = raw.get(key)
+            if isinstance(value, str):
+                value = value.strip()
+            elif value is not None and not (key == 'age' and type(value) is int):
+                # JSON rows can carry numbers, lists or objects anywhere
+                not_text.append(key)
+                value = None
+            row[attr] = value if value not in ('', None) else None
+        
+        error = None
+        if not_text:
+            error = f"Expected text for {', '.join(not_text)}"
+        elif not row['first_name'] or not row['last_name'] or not row['email'] or not row['role']:
+            error = "First name, last name, email, and role are required"
+        elif row['role'] not in USER_ROLES:
+            error = f"Unknown role '{row['role']}'"
+        elif row['age'] is not None:
+            try:
+                row['age'] = int(row['age'])
+            except ValueError:
+                error = f"Age must be a number, got '{row['age']}'"
+        
+        result = {"row": number, "username": row['username']}
+        results.append(result)
+        if error:
+            result.update(status="error", error=error)
+        else:
+            candidates.append((result, row))
+    
+    # Usernames must be unique within the file ...
+    seen = set()
+    accepted = []
+    for result, row in candidates:
+        username = row['username']
+        if username in seen:
+            result.update(status="error", error=f"Username '{username}' appears more than once in the import")
+            continue
+        if username:
+            seen.add(username)
+        accepted.append((result, row))
+    
+    # Most rows share the role's default password, so each distinct
+    # password is hashed once, and those run in parallel. This happens
+    # before the write session opens so it holds no connection meanwhile.
+    for _, row in accepted:
+        if not row['password']:
+            row['password'] = "The3Bears" if row['role'] == 'admin' else "Jambo2026!"
+    hashes = hash_passwords(row['password'] for _, row in accepted)
+    
+    db = SessionLocal()
+    try:
+        # ... and across the table, checked right before the insert
+        usernames = [row['username'] for _, row in accepted if row['username']]
+        taken = {u for (u,) in db.query(User.username).filter(User.username.in_(usernames))} if usernames else set()
+        
+        stamp = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+        records = []
+        for result, row in accepted:
+            password = row.pop('password')
+            if row['username'] in taken:
+                result.update(status="error", error=f"Username '{row['username']}' already taken")
+                continue
+            records.append(dict(row, id=f"user-{stamp}-{result['row']}", email=row['email'].lower(),
+                                password_hash=hashes[password]))
+            result.update(status="created", id=records[-1]['id'])
+        
+        if records:
+            db.execute(insert(User), records)
+            db.commit()
+        
+        created = len(records)
+        return jsonify({
+            "created": created,
+            "failed": len(results) - created,
+            "results": results
+        })
+    finally:
+        db.close()
+
+
 @app.route('/api/admin/users/<user_id>', methods=['PUT'])
 @require_admin
 def update_user(user_id):
@@ -612,6 +1426,7 @@ def update_user(user_id):
             user.password_hash = hash_password(data['password'])
         
         db.commit()
+        principal_cache.invalidate(user.id)
         return jsonify(user_to_dict(user))
     finally:
         db.close()
@@ -630,6 +1445,7 @@ def delete_user(user_id):
         
         db.delete(user)
         db.commit()
+        principal_cache.invalidate(user_id)
         return jsonify({"message": "User deleted"})
     finally:
         db.close()
@@ -648,6 +1464,7 @@ def reset_user_password(user_id):
         user.password_hash = hash_password(default_password)
         user.password_changed = False
         db.commit()
+        principal_cache.invalidate(user.id)
         
         return jsonify({"message": f"Password reset to {default_password}"})
     finally:
@@ -658,13 +1475,32 @@ def reset_user_password(user_id):
 # ADMIN: UNIT MANAGEMENT
 # ==========================================
 
+def unit_to_dict(u):
+    return {
+        "id": u.id,
+        "name": u.name,
+        "youthCapacity": u.youth_capacity,
+        "createdAt": u.created_at.isoformat() if u.created_at else None
+    }
+
+
+def parse_capacity(value):
+    """youthCapacity from a request: a non-negative int, or None to clear it"""
+    if value is None or value == '':
+        return None
+    capacity = int(value)
+    if capacity < 0:
+        raise ValueError("Capacity cannot be negative")
+    return capacity
+
+
 @app.route('/api/admin/units', methods=['GET'])
 @require_admin
 def get_all_units():
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
         units = db.query(Unit).all()
-        return jsonify([{"id": u.id, "name": u.name, "createdAt": u.created_at.isoformat() if u.created_at else None} for u in units])
+        return jsonify([unit_to_dict(u) for u in units])
     finally:
         db.close()
 
@@ -675,6 +1511,10 @@ def create_unit():
     data = request.get_json()
     if not data.get('name'):
         return jsonify({"error": "Unit name is required"}), 400
+    try:
+        youth_capacity = parse_capacity(data.get('youthCapacity'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "youthCapacity must be a non-negative number"}), 400
     
     db = SessionLocal()
     try:
@@ -683,7 +1523,7 @@ def create_unit():
             return jsonify({"error": "Unit already exists"}), 400
         
         unit_id = f"unit-{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}"
-        unit = Unit(id=unit_id, name=data['name'])
+        unit = Unit(id=unit_id, name=data['name'], youth_capacity=youth_capacity)
         db.add(unit)
         
         channel_id = data['name'].lower().replace(' ', '-').replace('#', '')
@@ -699,8 +1539,9 @@ def create_unit():
         )
         db.add(channel)
         db.commit()
+        channel_cache.invalidate()
         
-        return jsonify({"id": unit.id, "name": unit.name}), 201
+        return jsonify(unit_to_dict(unit)), 201
     finally:
         db.close()
 
@@ -729,8 +1570,16 @@ def update_unit(unit_id):
             for user in users:
                 user.unit = data['name']
         
+        if 'youthCapacity' in data:
+            try:
+                unit.youth_capacity = parse_capacity(data['youthCapacity'])
+            except (TypeError, ValueError):
+                return jsonify({"error": "youthCapacity must be a non-negative number"}), 400
+        
         db.commit()
-        return jsonify({"id": unit.id, "name": unit.name})
+        channel_cache.invalidate()
+        principal_cache.invalidate()
+        return jsonify(unit_to_dict(unit))
     finally:
         db.close()
 
@@ -747,6 +1596,7 @@ def delete_unit(unit_id):
         channel = db.query(Channel).filter(Channel.unit == unit.name).first()
         if channel:
             db.query(Message).filter(Message.channel_id == channel.id).delete()
+            maintenance.delete_channel_archive(db, channel.id)
             db.delete(channel)
         
         users = db.query(User).filter(User.unit == unit.name).all()
@@ -755,11 +1605,83 @@ def delete_unit(unit_id):
         
         db.delete(unit)
         db.commit()
+        channel_cache.invalidate()
+        principal_cache.invalidate()
         return jsonify({"message": "Unit deleted"})
     finally:
         db.close()
 
 
+# ==========================================
+# ADMIN: MESSAGE ARCHIVE
+# ==========================================
+
+@app.route('/api/admin/channels/<channel_id>/archive.csv', methods=['GET'])
+@require_admin
+def export_channel_archive(channel_id):
+    """Archived messages of a channel as CSV, oldest first (admin only)"""
+    db = ReadSessionLocal()
+    try:
+        if not channel_cache.get(db, channel_id):
+            return jsonify({"error": "Channel not found"}), 404
+    finally:
+        db.close()
+    
+    def generate():
+        db = ReadSessionLocal()
+        try:
+            names = {u.id: f"{u.first_name} {u.last_name}" for u in db.query(User.id, User.first_name, User.last_name)}
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(["id", "createdAt", "authorId", "authorName", "content", "imageUrl"])
+            for m in maintenance.iter_archive(db, channel_id):
+                writer.writerow([m["id"], m["createdAt"], m["userId"], names.get(m["userId"], "Unknown"),
+                                 m["content"], m["imageUrl"] or ""])
+                if buffer.tell() > 64 * 1024:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        finally:
+            db.close()
+    
+    return Response(generate(), mimetype='text/csv', headers={
+        'Content-Disposition': f'attachment; filename="{channel_id}-archive.csv"'
+    })
+
+
+# ==========================================
+# ADMIN: NOTIFICATION QUEUE
+# ==========================================
+
+@app.route('/api/admin/jobs', methods=['GET'])
+@require_admin
+def get_job_queue_stats():
+    """Notification queue depth and delivery latency (admin only)"""
+    db = ReadSessionLocal()
+    try:
+        stats = jobs.queue_stats(db)
+        failures = db.query(NotificationJob).filter(NotificationJob.status == "failed").order_by(NotificationJob.finished_at.desc()).limit(20).all()
+        stats["recentFailures"] = [{
+            "id": j.id,
+            "kind": j.kind,
+            "attempts": j.attempts,
+            "lastError": j.last_error,
+            "createdAt": j.created_at.isoformat() if j.created_at else None,
+            "finishedAt": j.finished_at.isoformat() if j.finished_at else None
+        } for j in failures]
+        return jsonify(stats)
+    finally:
+        db.close()
+
+
+@app.route('/api/admin/write-batches', methods=['GET'])
+@require_admin
+def get_write_batch_stats():
+    """Group-commit counters for the worker that answers (admin only)"""
+    return jsonify(write_batcher.stats())
+
+
 # ==========================================
 # USER SETTINGS
 # ==========================================
@@ -787,25 +1709,69 @@ def update_notification_settings():
 @require_auth
 def get_stats():
     """Get contingent statistics"""
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
-        youth_count = db.query(User).filter(User.role == 'youth', User.active == True).count()
-        adult_count = db.query(User).filter(User.role.in_(['admin', 'adult_leader']), User.active == True).count()
-        parent_count = db.query(User).filter(User.role == 'parent', User.active == True).count()
-        total_count = db.query(User).filter(User.active == True).count()
+        versions = get_data_versions(db, 'users', 'units')
+        etag = compute_etag(versions)
+        cached = not_modified(etag)
+        if cached:
+            return cached
         
-        return jsonify({
-            "youth": youth_count,
-            "adults": adult_count,
-            "parents": parent_count,
-            "total": total_count,
-            "youthCapacity": 36,
-            "youthRemaining": 36 - youth_count
-        })
+        return conditional_json(contingent_stats(db, versions), etag)
     finally:
         db.close()
 
 
+CONTINGENT_YOUTH_CAPACITY = int(os.getenv("CONTINGENT_YOUTH_CAPACITY", "36"))
+STATS_ROLE_BUCKETS = {'youth': 'youth', 'admin': 'adults', 'adult_leader': 'adults', 'parent': 'parents'}
+
+# (users version, units version) -> stats dict; replaced whole, so no lock needed
+_stats_cache = (None, None)
+
+
+def contingent_stats(db, versions):
+    """Active member counts by role, overall and per unit, cached until users or units change"""
+    global _stats_cache
+    key = (versions['users'], versions['units'])
+    cached_key, stats = _stats_cache
+    if cached_key == key:
+        return stats
+    
+    def empty_counts():
+        return {"youth": 0, "adults": 0, "parents": 0, "total": 0}
+    
+    totals = empty_counts()
+    per_unit = {}
+    rows = db.query(User.unit, User.role, func.count()).filter(User.active == True).group_by(User.unit, User.role)
+    for unit_name, role, count in rows:
+        bucket = STATS_ROLE_BUCKETS.get(role)
+        targets = [totals] if unit_name is None else [totals, per_unit.setdefault(unit_name, empty_counts())]
+        for counts in targets:
+            counts["total"] += count
+            if bucket:
+                counts[bucket] += count
+    
+    units = []
+    for unit in db.query(Unit).order_by(Unit.name):
+        counts = per_unit.get(unit.name, empty_counts())
+        capacity = unit.youth_capacity
+        units.append(dict(
+            counts,
+            name=unit.name,
+            youthCapacity=capacity,
+            youthRemaining=capacity - counts["youth"] if capacity is not None else None
+        ))
+    
+    stats = dict(
+        totals,
+        youthCapacity=CONTINGENT_YOUTH_CAPACITY,
+        youthRemaining=CONTINGENT_YOUTH_CAPACITY - totals["youth"],
+        units=units
+    )
+    _stats_cache = (key, stats)
+    return stats
+
+
 # ==========================================
 # INFO CARDS (Dynamic Home Page Content)
 # ==========================================
@@ -814,10 +1780,15 @@ def get_stats():
 @require_auth
 def get_info_cards():
     """Get all active info cards"""
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
+        etag = compute_etag(get_data_versions(db, 'info_cards'))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        
         cards = db.query(InfoCard).filter(InfoCard.active == True).order_by(InfoCard.sort_order, InfoCard.created_at.desc()).all()
-        return jsonify([{
+        return conditional_json([{
             "id": c.id,
             "title": c.title,
             "content": c.content,
@@ -826,7 +1797,7 @@ def get_info_cards():
             "linkUrl": c.link_url,
             "linkText": c.link_text,
             "sortOrder": c.sort_order
-        } for c in cards])
+        } for c in cards], etag)
     finally:
         db.close()
 
@@ -835,7 +1806,7 @@ def get_info_cards():
 @require_admin
 def get_all_info_cards():
     """Get all info cards including inactive (admin only)"""
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
         cards = db.query(InfoCard).order_by(InfoCard.sort_order, InfoCard.created_at.desc()).all()
         return jsonify([{
@@ -971,8 +1942,9 @@ def subscribe_push():
     if not data.get('endpoint') or not data.get('keys'):
         return jsonify({"error": "Invalid subscription data"}), 400
     
-    db = SessionLocal()
-    try:
+    user_id = g.user_id
+    
+    def write(db):
         # Check if subscription already exists
         existing = db.query(PushSubscription).filter(
             PushSubscription.endpoint == data['endpoint']
@@ -980,23 +1952,24 @@ def subscribe_push():
         
         if existing:
             # Update existing subscription
-            existing.user_id = g.user_id
+            existing.user_id = user_id
             existing.p256dh_key = data['keys'].get('p256dh')
             existing.auth_key = data['keys'].get('auth')
         else:
             # Create new subscription
             subscription = PushSubscription(
-                user_id=g.user_id,
+                user_id=user_id,
                 endpoint=data['endpoint'],
                 p256dh_key=data['keys'].get('p256dh'),
                 auth_key=data['keys'].get('auth')
             )
             db.add(subscription)
-        
-        db.commit()
-        return jsonify({"message": "Subscribed to push notifications"})
-    finally:
-        db.close()
+        # Flush so a second subscribe for this endpoint in the same batch
+        # finds the row instead of inserting a duplicate
+        db.flush()
+    
+    write_batcher.submit(write)
+    return jsonify({"message": "Subscribed to push notifications"})
 
 
 @app.route('/api/push/unsubscribe', methods=['POST'])
@@ -1023,19 +1996,102 @@ def unsubscribe_push():
         db.close()
 
 
-def send_push_notification(title, body, url=None, exclude_user_id=None):
-    """Send push notification to all subscribers"""
+PUSH_MAX_WORKERS = int(os.getenv("PUSH_MAX_WORKERS", "16"))
+PUSH_TIMEOUT_SECONDS = 10
+
+_push_executor = None
+_push_local = threading.local()
+
+
+def get_push_executor():
+    """Bounded pool shared by every broadcast in this worker process"""
+    global _push_executor
+    if _push_executor is None:
+        _push_executor = ThreadPoolExecutor(max_workers=PUSH_MAX_WORKERS, thread_name_prefix="push")
+    return _push_executor
+
+
+def get_vapid_headers(endpoint):
+    """VAPID Authorization header for the endpoint's push service, cached per origin"""
+    parsed = urlparse(endpoint)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    now = time.time()
+    
+    with _vapid_header_lock:
+        cached = _vapid_header_cache.get(origin)
+        if cached and cached[1] - VAPID_TOKEN_REFRESH_MARGIN_SECONDS > now:
+            return cached[0]
+    
+    expires_at = int(now) + VAPID_TOKEN_LIFETIME_SECONDS
+    headers = VAPID_SIGNER.sign({"sub": VAPID_EMAIL, "aud": origin, "exp": expires_at})
+    with _vapid_header_lock:
+        _vapid_header_cache[origin] = (headers, expires_at)
+    return headers
+
+
+def deliver_push(endpoint, p256dh_key, auth_key, payload):
+    """
+    Deliver one push message. Runs on the push pool; each pool thread keeps
+    its own HTTP session so connections to a push service are reused.
+    Returns "sent", "gone" (subscription is dead), "retry" or "failed".
+    """
+    session = getattr(_push_local, "session", None)
+    if session is None:
+        session = _push_local.session = requests.Session()
+    
+    try:
+        webpush(
+            subscription_info={
+                "endpoint": endpoint,
+                "keys": {
+                    "p256dh": p256dh_key,
+                    "auth": auth_key
+                }
+            },
+            data=payload,
+            headers=get_vapid_headers(endpoint),
+            timeout=PUSH_TIMEOUT_SECONDS,
+            requests_session=session
+        )
+        return "sent"
+    except WebPushException as e:
+        logger.error(f"Push failed for {endpoint}: {e}")
+        status = e.response.status_code if e.response is not None else None
+        # If subscription is invalid (410 Gone or 404), mark for removal
+        if status in [404, 410]:
+            return "gone"
+        if status is None or status == 429 or status >= 500:
+            return "retry"
+        return "failed"
+    except Exception as e:
+        logger.error(f"Push failed for {endpoint}: {e}")
+        return "retry"
+
+
+def send_push_notification(title, body, url=None, exclude_user_id=None, endpoints=None):
+    """
+    Send push notification to all subscribers (or only to the given endpoints).
+    Deliveries run concurrently on the push pool.
+    Returns the endpoints that failed in a way worth retrying.
+    """
     if not PUSH_ENABLED:
         logger.warning("Push notifications not enabled - pywebpush not installed")
-        return
+        return []
     
-    db = SessionLocal()
+    retry_endpoints = []
     try:
-        query = db.query(PushSubscription)
-        if exclude_user_id:
-            query = query.filter(PushSubscription.user_id != exclude_user_id)
-        
-        subscriptions = query.all()
+        # Read the subscribers and let go of the connection before the
+        # fan-out, which can take as long as the slowest push service
+        db = ReadSessionLocal()
+        try:
+            query = db.query(PushSubscription.endpoint, PushSubscription.p256dh_key, PushSubscription.auth_key)
+            if exclude_user_id:
+                query = query.filter(PushSubscription.user_id != exclude_user_id)
+            if endpoints is not None:
+                query = query.filter(PushSubscription.endpoint.in_(endpoints))
+            subscriptions = query.all()
+        finally:
+            db.close()
         
         payload = json.dumps({
             "title": title,
@@ -1045,40 +2101,58 @@ def send_push_notification(title, body, url=None, exclude_user_id=None):
             "badge": "/jambo-icon-192.png"
         })
         
-        failed_endpoints = []
+        executor = get_push_executor()
+        futures = {
+            executor.submit(deliver_push, sub.endpoint, sub.p256dh_key, sub.auth_key, payload): sub.endpoint
+            for sub in subscriptions
+        }
         
-        for sub in subscriptions:
-            try:
-                webpush(
-                    subscription_info={
-                        "endpoint": sub.endpoint,
-                        "keys": {
-                            "p256dh": sub.p256dh_key,
-                            "auth": sub.auth_key
-                        }
-                    },
-                    data=payload,
-                    vapid_private_key=VAPID_PRIVATE_KEY_FILE,
-                    vapid_claims={"sub": VAPID_EMAIL}
-                )
-                logger.info(f"Push sent to user {sub.user_id}")
-            except WebPushException as e:
-                logger.error(f"Push failed for {sub.endpoint}: {e}")
-                # If subscription is invalid (410 Gone or 404), mark for removal
-                if e.response and e.response.status_code in [404, 410]:
-                    failed_endpoints.append(sub.endpoint)
+        failed_endpoints = []
+        sent = 0
+        for future in as_completed(futures):
+            result = future.result()
+            if result == "sent":
+                sent += 1
+            elif result == "gone":
+                failed_endpoints.append(futures[future])
+            elif result == "retry":
+                retry_endpoints.append(futures[future])
+        logger.info(f"Push sent to {sent} of {len(subscriptions)} subscriptions")
         
         # Clean up invalid subscriptions
         if failed_endpoints:
-            db.query(PushSubscription).filter(
-                PushSubscription.endpoint.in_(failed_endpoints)
-            ).delete(synchronize_session=False)
-            db.commit()
+            db = SessionLocal()
+            try:
+                db.query(PushSubscription).filter(
+                    PushSubscription.endpoint.in_(failed_endpoints)
+                ).delete(synchronize_session=False)
+                db.commit()
+            finally:
+                db.close()
             
     except Exception as e:
         logger.error(f"Error sending push notifications: {e}")
-    finally:
-        db.close()
+    
+    return retry_endpoints
+
+
+def run_push_job(payload):
+    """Job handler: web push to all subscribers"""
+    retry_endpoints = send_push_notification(
+        title=payload["title"],
+        body=payload["body"],
+        url=payload.get("url"),
+        exclude_user_id=payload.get("exclude_user_id"),
+        endpoints=payload.get("endpoints")
+    )
+    if retry_endpoints:
+        raise jobs.RetryJob(f"{len(retry_endpoints)} push deliveries failed", payload={**payload, "endpoints": retry_endpoints})
+
+
+jobs.register_handler("push", run_push_job)
+
+# Handlers are registered above, so the worker can start draining the queue
+jobs.start_worker()
 
 
 if __name__ == '__main__':
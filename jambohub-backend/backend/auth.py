@@ -2,24 +2,69 @@
 import bcrypt
 import jwt
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, g
 
+from .models import ReadSessionLocal, User, DataVersion
+
 # Secret key for JWT - use environment variable in production
 SECRET_KEY = os.getenv("JWT_SECRET", "jambohub-dev-secret-change-in-production")
 TOKEN_EXPIRY_HOURS = 24 * 7  # 1 week
+STREAM_TOKEN_SECONDS = 60  # only checked when the stream connects
 
+# Authenticated principals are cached per process. Entries expire after the
+# TTL; any write to users (seen through the data_versions counter, re-checked
+# at most every few seconds) clears the whole cache in every worker.
+PRINCIPAL_TTL_SECONDS = 60
+PRINCIPAL_REVALIDATE_SECONDS = 2.0
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+# bcrypt runs on a small dedicated pool so a burst of logins can't occupy
+# every request thread or the whole CPU. Work beyond the queue limit is
+# refused with PasswordHasherBusy (503) instead of piling up behind it.
+# Hashes made with a different cost are upgraded on the next good login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "8"))
+PASSWORD_HASH_RETRY_AFTER_SECONDS = 2
 
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT)
 
-def verify_password(password: str, password_hash: str) -> bool:
-    """Verify a password against its hash"""
+
+def _reset_hasher_after_fork():
+    # The gunicorn master hashes the seed password when it migrates a new
+    # database; forked workers must not inherit that pool's dead threads
+    global _hash_executor, _hash_slots
+    _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+    _hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT)
+
+
+os.register_at_fork(after_in_child=_reset_hasher_after_fork)
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password hashes already queued"""
+
+
+def _run_hasher(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        return _hash_executor.submit(fn, *args).result()
+    finally:
+        _hash_slots.release()
+
+
+def _hash(password):
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def _check(password, password_hash):
     try:
         return bcrypt.checkpw(
             password.encode('utf-8'), 
@@ -29,6 +74,34 @@ def verify_password(password: str, password_hash: str) -> bool:
         return False
 
 
+def hash_password(password: str) -> str:
+    """Hash a password using bcrypt"""
+    return _run_hasher(_hash, password)
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """Verify a password against its hash"""
+    return _run_hasher(_check, password, password_hash)
+
+
+def hash_passwords(passwords) -> dict:
+    """
+    Hash each distinct password once, in parallel on the hashing pool.
+    Returns {password: hash}. Meant for admin bulk operations, so it waits
+    for the pool rather than being shed like a single hash.
+    """
+    futures = {p: _hash_executor.submit(_hash, p) for p in set(passwords)}
+    return {p: f.result() for p, f in futures.items()}
+
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """True if the hash was made with a different cost than BCRYPT_ROUNDS"""
+    try:
+        return int(password_hash.split('$')[2]) != BCRYPT_ROUNDS
+    except (AttributeError, IndexError, ValueError):
+        return True
+
+
 def create_token(user_id: str, role: str) -> str:
     """Create a JWT token for a user"""
     payload = {
@@ -40,6 +113,22 @@ def create_token(user_id: str, role: str) -> str:
     return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
 
 
+def create_stream_token(user_id: str, channel_id: str) -> str:
+    """
+    Short-lived token that opens one channel's message stream and nothing
+    else. It travels in the stream URL (EventSource can't set headers), so
+    it ends up in access logs; the session token never should.
+    """
+    payload = {
+        "user_id": user_id,
+        "scope": "stream",
+        "channel_id": channel_id,
+        "exp": datetime.utcnow() + timedelta(seconds=STREAM_TOKEN_SECONDS),
+        "iat": datetime.utcnow()
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
+
+
 def decode_token(token: str) -> dict:
     """Decode and validate a JWT token"""
     try:
@@ -51,6 +140,103 @@ def decode_token(token: str) -> dict:
         return None
 
 
+class Principal:
+    """The authenticated user, as much of it as request handlers need"""
+    
+    __slots__ = ("id", "role", "unit", "active", "first_name", "last_name")
+    
+    def __init__(self, user):
+        self.id = user.id
+        self.role = user.role
+        self.unit = user.unit
+        self.active = user.active is not False
+        self.first_name = user.first_name
+        self.last_name = user.last_name
+    
+    @property
+    def name(self):
+        return f"{self.first_name} {self.last_name}"
+
+
+class PrincipalCache:
+    def __init__(self, ttl=PRINCIPAL_TTL_SECONDS, revalidate_seconds=PRINCIPAL_REVALIDATE_SECONDS):
+        self._ttl = ttl
+        self._revalidate_seconds = revalidate_seconds
+        self._lock = threading.Lock()
+        self._entries = {}  # user_id -> (Principal, loaded_at)
+        self._version = None
+        self._checked_at = 0.0
+    
+    def invalidate(self, user_id=None):
+        """Drop one user, or everyone if user_id is None"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+    
+    def get(self, user_id):
+        """Principal for user_id, or None if the user no longer exists"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            fresh = now - self._checked_at < self._revalidate_seconds
+        if entry and fresh and now - entry[1] < self._ttl:
+            return entry[0]
+        
+        db = ReadSessionLocal()
+        try:
+            if not fresh:
+                row = db.query(DataVersion.version).filter(DataVersion.key == 'users').first()
+                version = row.version if row else 0
+                with self._lock:
+                    if version != self._version:
+                        self._entries.clear()
+                        self._version = version
+                    self._checked_at = now
+                    entry = self._entries.get(user_id)
+                if entry and now - entry[1] < self._ttl:
+                    return entry[0]
+            
+            user = db.query(User).filter(User.id == user_id).first()
+            principal = Principal(user) if user else None
+        finally:
+            db.close()
+        
+        if principal:
+            with self._lock:
+                self._entries[user_id] = (principal, now)
+        return principal
+
+
+principal_cache = PrincipalCache()
+
+
+def _authenticate(token, scope=None, channel_id=None):
+    """
+    Validate token and populate g; returns an error response or None.
+    Session tokens carry no scope; stream tokens only pass for their channel.
+    """
+    if not token:
+        return jsonify({"error": "Authentication required"}), 401
+    
+    payload = decode_token(token)
+    if not payload or payload.get("scope") != scope or payload.get("channel_id") != channel_id:
+        return jsonify({"error": "Invalid or expired token"}), 401
+    
+    principal = principal_cache.get(payload.get("user_id"))
+    if not principal:
+        return jsonify({"error": "Account not found"}), 401
+    if not principal.active:
+        return jsonify({"error": "Account is disabled"}), 401
+    
+    # Store user info in Flask g object
+    g.user = principal
+    g.user_id = principal.id
+    g.user_role = principal.role
+    return None
+
+
 def require_auth(f):
     """Decorator to require authentication"""
     @wraps(f)
@@ -62,16 +248,31 @@ def require_auth(f):
         if auth_header and auth_header.startswith('Bearer '):
             token = auth_header.split(' ')[1]
         
-        if not token:
-            return jsonify({"error": "Authentication required"}), 401
+        error = _authenticate(token)
+        if error:
+            return error
         
-        payload = decode_token(token)
-        if not payload:
-            return jsonify({"error": "Invalid or expired token"}), 401
-        
-        # Store user info in Flask g object
-        g.user_id = payload.get("user_id")
-        g.user_role = payload.get("role")
+        return f(*args, **kwargs)
+    
+    return decorated
+
+
+def require_stream_auth(f):
+    """
+    Decorator to require authentication on a channel's Server-Sent Events
+    endpoint. EventSource cannot set headers, so browsers pass a stream
+    token (create_stream_token) for that channel in ?token=; other clients
+    may send their session token as a Bearer header.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            error = _authenticate(auth_header.split(' ')[1])
+        else:
+            error = _authenticate(request.args.get('token'), scope="stream", channel_id=kwargs.get('channel_id'))
+        if error:
+            return error
         
         return f(*args, **kwargs)
     
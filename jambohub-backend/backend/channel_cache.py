@@ -0,0 +1,100 @@
+# backend/channel_cache.py
+"""
+In-process cache of channel metadata and parsed role sets
+
+Channels change only through a handful of admin endpoints, but every read
+and post checks them. The cache holds every channel with allowed_roles and
+can_post_roles already split into sets, tagged with the 'channels' counter
+from data_versions (bumped by triggers on any write to the table).
+
+Handlers that change channels call invalidate() for an immediate local
+reload; the other gunicorn worker notices the bumped counter either from a
+version the caller already read (e.g. for an ETag) or by re-checking it at
+most every REVALIDATE_SECONDS.
+"""
+
+import threading
+import time
+
+from .models import Channel, DataVersion
+
+REVALIDATE_SECONDS = 2.0
+VERSION_KEY = "channels"
+
+
+class ChannelInfo:
+    """Read-only snapshot of a Channel row"""
+
+    __slots__ = (
+        "id", "name", "description", "icon", "type", "unit",
+        "allowed_roles", "can_post_roles",
+        "email_notifications", "push_notifications", "active", "retention_days",
+    )
+
+    def __init__(self, channel):
+        self.id = channel.id
+        self.name = channel.name
+        self.description = channel.description
+        self.icon = channel.icon
+        self.type = channel.type
+        self.unit = channel.unit
+        self.allowed_roles = frozenset(channel.allowed_roles.split(','))
+        self.can_post_roles = frozenset(channel.can_post_roles.split(','))
+        self.email_notifications = bool(channel.email_notifications)
+        self.push_notifications = channel.push_notifications is not False
+        self.active = channel.active is not False
+        self.retention_days = channel.retention_days
+
+
+class ChannelCache:
+    def __init__(self, revalidate_seconds=REVALIDATE_SECONDS):
+        self._revalidate_seconds = revalidate_seconds
+        self._lock = threading.Lock()
+        self._channels = None  # id -> ChannelInfo, in table order
+        self._version = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._channels = None
+
+    def all(self, db, version=None):
+        """
+        Every channel (including inactive), keyed by id.
+
+        Pass the current 'channels' version if the caller already has it;
+        otherwise it is re-read from the database at most every few seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            channels, cached_version, checked_at = self._channels, self._version, self._checked_at
+
+        if channels is not None:
+            if version is None and now - checked_at < self._revalidate_seconds:
+                return channels
+            if version is None:
+                version = self._read_version(db)
+            if version == cached_version:
+                with self._lock:
+                    self._checked_at = now
+                return channels
+
+        return self._load(db, now)
+
+    def get(self, db, channel_id, version=None):
+        return self.all(db, version).get(channel_id)
+
+    def _read_version(self, db):
+        row = db.query(DataVersion.version).filter(DataVersion.key == VERSION_KEY).first()
+        return row.version if row else 0
+
+    def _load(self, db, now):
+        # Version first: if a write lands in between, we keep the older
+        # version number and simply reload again on the next check
+        version = self._read_version(db)
+        channels = {c.id: ChannelInfo(c) for c in db.query(Channel).all()}
+        with self._lock:
+            self._channels = channels
+            self._version = version
+            self._checked_at = now
+        return channels
@@ -8,8 +8,9 @@ Uses Gmail SMTP
 import os
 import smtplib
 from datetime import datetime
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.message import EmailMessage
+from html import escape
+from string import Template
 from typing import List
 import logging
 
@@ -23,9 +24,100 @@ SENDER_NAME = "JamboHub"
 GMAIL_PASSWORD = os.getenv("GMAIL_APP_PASSWORD")
 SMTP_SERVER = "smtp.gmail.com"
 SMTP_PORT = 465
+SMTP_TIMEOUT = 30  # seconds
 
+# Gmail drops long-lived sessions; start a new connection after this many sends
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "50"))
 
-def send_email(to_email: str, to_name: str, subject: str, html_content: str) -> bool:
+
+def is_email_configured() -> bool:
+    """True if SMTP credentials are available"""
+    return bool(GMAIL_PASSWORD)
+
+
+class SMTPSession:
+    """
+    One logged-in SMTP connection reused for many messages
+    
+    Connects lazily on the first send, reconnects once if the server drops
+    the connection, and starts a fresh connection after max_messages so a
+    long broadcast stays under Gmail's per-connection limits.
+    
+    Usage:
+        with SMTPSession() as session:
+            for msg in messages:
+                session.send(msg)
+    """
+    
+    def __init__(self, max_messages: int = SMTP_MAX_MESSAGES_PER_CONNECTION, connect=None):
+        self.max_messages = max_messages
+        self._connect = connect or _connect_gmail
+        self._server = None
+        self._sent_on_connection = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+            self._sent_on_connection = 0
+    
+    def send(self, msg) -> bool:
+        """Send one prepared message; returns True if the server accepted it"""
+        if self._sent_on_connection >= self.max_messages:
+            self.close()
+        
+        for attempt in (1, 2):
+            try:
+                if self._server is None:
+                    self._server = self._connect()
+                self._server.send_message(msg)
+                self._sent_on_connection += 1
+                return True
+            except smtplib.SMTPRecipientsRefused as e:
+                # Bad address - the connection itself is fine
+                logger.error(f"Recipient refused {msg['To']}: {e}")
+                return False
+            except (smtplib.SMTPException, OSError) as e:
+                # Dropped or broken connection - reconnect and try once more
+                self.close()
+                if attempt == 2:
+                    logger.error(f"Error sending email to {msg['To']}: {e}")
+                    return False
+        return False
+
+
+def _connect_gmail():
+    server = smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    server.login(SENDER_EMAIL, GMAIL_PASSWORD)
+    return server
+
+
+def build_email(to_email: str, subject: str, html_content: str, text_content: str = None) -> EmailMessage:
+    """Build the MIME message for one recipient"""
+    msg = EmailMessage()
+    msg['From'] = f"{SENDER_NAME} <{SENDER_EMAIL}>"
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    
+    # Parts go least to most preferred; clients show the last one they support
+    if text_content is not None:
+        msg.set_content(text_content)
+        msg.add_alternative(html_content, subtype='html')
+    else:
+        msg.set_content(html_content, subtype='html')
+    return msg
+
+
+def send_email(to_email: str, to_name: str, subject: str, html_content: str, session: SMTPSession = None, text_content: str = None) -> bool:
     """
     Send email via Gmail SMTP
     
@@ -34,178 +126,250 @@ def send_email(to_email: str, to_name: str, subject: str, html_content: str) ->
         to_name: Recipient name
         subject: Email subject line
         html_content: HTML body of email
+        session: Open SMTPSession to reuse; a one-off connection is used if omitted
+        text_content: Optional plain-text alternative
     
     Returns:
         bool: True if successful, False otherwise
     """
-    if not GMAIL_PASSWORD:
+    if not GMAIL_PASSWORD and session is None:
         logger.warning("GMAIL_APP_PASSWORD not set - skipping email")
         return False
     
     try:
-        msg = MIMEMultipart('alternative')
-        msg['From'] = f"{SENDER_NAME} <{SENDER_EMAIL}>"
-        msg['To'] = to_email
-        msg['Subject'] = subject
+        msg = build_email(to_email, subject, html_content, text_content)
         
-        html_part = MIMEText(html_content, 'html')
-        msg.attach(html_part)
+        if session is not None:
+            sent = session.send(msg)
+        else:
+            with SMTPSession() as one_off:
+                sent = one_off.send(msg)
         
-        with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT) as server:
-            server.login(SENDER_EMAIL, GMAIL_PASSWORD)
-            server.send_message(msg)
-        
-        logger.info(f"Email sent to {to_email}: {subject}")
-        return True
+        if sent:
+            logger.info(f"Email sent to {to_email}: {subject}")
+        return sent
             
     except Exception as e:
         logger.error(f"Error sending email to {to_email}: {str(e)}")
         return False
 
 
+# ==========================================
+# NEW MESSAGE TEMPLATE
+# ==========================================
+
+PREVIEW_MAX_LENGTH = 200
+
+# Compiled once at import. $-placeholders, so the stylesheet needs no escaping.
+NEW_MESSAGE_HTML = Template("""\
+<html>
+<head>
+    <style>
+        body {
+            font-family: 'Nunito Sans', Arial, sans-serif;
+            line-height: 1.6;
+            color: #333;
+            max-width: 500px;
+            margin: 0 auto;
+            padding: 20px;
+        }
+        .header {
+            background: linear-gradient(135deg, #7C3AED 0%, #A855F7 100%);
+            color: white;
+            padding: 24px;
+            text-align: center;
+            border-radius: 12px 12px 0 0;
+        }
+        .header h2 {
+            margin: 0;
+            font-size: 20px;
+        }
+        .content {
+            background-color: #f8f7fc;
+            padding: 24px;
+            border: 1px solid #e5e7eb;
+            border-radius: 0 0 12px 12px;
+        }
+        .message-box {
+            background-color: white;
+            padding: 16px;
+            margin: 16px 0;
+            border-left: 4px solid #7C3AED;
+            border-radius: 8px;
+        }
+        .sender {
+            font-weight: 700;
+            color: #7C3AED;
+            margin-bottom: 8px;
+        }
+        .channel-badge {
+            display: inline-block;
+            background: #EDE9FE;
+            color: #7C3AED;
+            padding: 4px 12px;
+            border-radius: 16px;
+            font-size: 14px;
+            font-weight: 600;
+        }
+        .cta {
+            display: inline-block;
+            background: linear-gradient(135deg, #7C3AED 0%, #A855F7 100%);
+            color: white;
+            padding: 12px 24px;
+            border-radius: 8px;
+            text-decoration: none;
+            font-weight: 700;
+            margin-top: 16px;
+        }
+        .footer {
+            margin-top: 24px;
+            padding-top: 16px;
+            border-top: 1px solid #e5e7eb;
+            font-size: 12px;
+            color: #6b7280;
+            text-align: center;
+        }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h2>🏕️ New Message in JamboHub</h2>
+    </div>
+    <div class="content">
+        <p>Hi $recipient_name,</p>
+
+        <p>There's a new message in <span class="channel-badge">$channel_name</span></p>
+
+        <div class="message-box">
+            <div class="sender">$sender_name</div>
+            <div>$message_preview</div>
+        </div>
+
+        <p>
+            <a href="https://jambohub.fly.dev" class="cta">Open JamboHub</a>
+        </p>
+    </div>
+    <div class="footer">
+        <p>VAHC Contingent • National Jamboree 2026</p>
+        <p>To stop receiving these emails, update your notification settings in JamboHub.</p>
+    </div>
+</body>
+</html>
+""")
+
+NEW_MESSAGE_TEXT = Template("""\
+Hi $recipient_name,
+
+There's a new message in $channel_name
+
+$sender_name:
+$message_preview
+
+Open JamboHub: https://jambohub.fly.dev
+
+--
+VAHC Contingent - National Jamboree 2026
+To stop receiving these emails, update your notification settings in JamboHub.
+""")
+
+# Stands in for the recipient name while the shared part is rendered
+_RECIPIENT_SLOT = "\x00recipient\x00"
+
+
+class NewMessageEmail:
+    """
+    A new-message notification rendered once per post
+    
+    The channel, sender and preview are substituted and HTML-escaped up
+    front; per recipient only the name is joined in and the message built.
+    """
+    
+    def __init__(self, channel_name: str, sender_name: str, message_preview: str):
+        # Truncate message preview
+        if len(message_preview) > PREVIEW_MAX_LENGTH:
+            message_preview = message_preview[:PREVIEW_MAX_LENGTH] + "..."
+        
+        self.subject = f"New message in {channel_name} - JamboHub"
+        
+        html = NEW_MESSAGE_HTML.substitute(
+            recipient_name=_RECIPIENT_SLOT,
+            channel_name=escape(channel_name),
+            sender_name=escape(sender_name),
+            message_preview=escape(message_preview)
+        )
+        text = NEW_MESSAGE_TEXT.substitute(
+            recipient_name=_RECIPIENT_SLOT,
+            channel_name=channel_name,
+            sender_name=sender_name,
+            message_preview=message_preview
+        )
+        self._html_parts = html.split(_RECIPIENT_SLOT)
+        self._text_parts = text.split(_RECIPIENT_SLOT)
+    
+    def render(self, recipient_name: str):
+        """Returns (html, text) bodies for one recipient"""
+        return (
+            escape(recipient_name).join(self._html_parts),
+            recipient_name.join(self._text_parts)
+        )
+    
+    def build(self, to_email: str, recipient_name: str) -> EmailMessage:
+        html, text = self.render(recipient_name)
+        return build_email(to_email, self.subject, html, text)
+
+
 def send_new_message_notification(
     recipient_email: str,
     recipient_name: str,
     channel_name: str,
     sender_name: str,
-    message_preview: str
+    message_preview: str,
+    session: SMTPSession = None
 ) -> bool:
     """
     Send notification about a new message in a channel
     """
-    # Truncate message preview
-    if len(message_preview) > 200:
-        message_preview = message_preview[:200] + "..."
-    
-    subject = f"New message in {channel_name} - JamboHub"
-    
-    html_content = f"""
-    <html>
-    <head>
-        <style>
-            body {{
-                font-family: 'Nunito Sans', Arial, sans-serif;
-                line-height: 1.6;
-                color: #333;
-                max-width: 500px;
-                margin: 0 auto;
-                padding: 20px;
-            }}
-            .header {{
-                background: linear-gradient(135deg, #7C3AED 0%, #A855F7 100%);
-                color: white;
-                padding: 24px;
-                text-align: center;
-                border-radius: 12px 12px 0 0;
-            }}
-            .header h2 {{
-                margin: 0;
-                font-size: 20px;
-            }}
-            .content {{
-                background-color: #f8f7fc;
-                padding: 24px;
-                border: 1px solid #e5e7eb;
-                border-radius: 0 0 12px 12px;
-            }}
-            .message-box {{
-                background-color: white;
-                padding: 16px;
-                margin: 16px 0;
-                border-left: 4px solid #7C3AED;
-                border-radius: 8px;
-            }}
-            .sender {{
-                font-weight: 700;
-                color: #7C3AED;
-                margin-bottom: 8px;
-            }}
-            .channel-badge {{
-                display: inline-block;
-                background: #EDE9FE;
-                color: #7C3AED;
-                padding: 4px 12px;
-                border-radius: 16px;
-                font-size: 14px;
-                font-weight: 600;
-            }}
-            .cta {{
-                display: inline-block;
-                background: linear-gradient(135deg, #7C3AED 0%, #A855F7 100%);
-                color: white;
-                padding: 12px 24px;
-                border-radius: 8px;
-                text-decoration: none;
-                font-weight: 700;
-                margin-top: 16px;
-            }}
-            .footer {{
-                margin-top: 24px;
-                padding-top: 16px;
-                border-top: 1px solid #e5e7eb;
-                font-size: 12px;
-                color: #6b7280;
-                text-align: center;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h2>🏕️ New Message in JamboHub</h2>
-        </div>
-        <div class="content">
-            <p>Hi {recipient_name},</p>
-            
-            <p>There's a new message in <span class="channel-badge">{channel_name}</span></p>
-            
-            <div class="message-box">
-                <div class="sender">{sender_name}</div>
-                <div>{message_preview}</div>
-            </div>
-            
-            <p>
-                <a href="https://jambohub.fly.dev" class="cta">Open JamboHub</a>
-            </p>
-        </div>
-        <div class="footer">
-            <p>VAHC Contingent • National Jamboree 2026</p>
-            <p>To stop receiving these emails, update your notification settings in JamboHub.</p>
-        </div>
-    </body>
-    </html>
-    """
-    
-    return send_email(recipient_email, recipient_name, subject, html_content)
+    email = NewMessageEmail(channel_name, sender_name, message_preview)
+    html, text = email.render(recipient_name)
+    return send_email(recipient_email, recipient_name, email.subject, html, session=session, text_content=text)
 
 
 def send_bulk_channel_notification(
     recipients: List[dict],
     channel_name: str,
     sender_name: str,
-    message_preview: str
-) -> int:
+    message_preview: str,
+    session: SMTPSession = None
+) -> List[dict]:
     """
-    Send notification to multiple recipients
+    Send notification to multiple recipients over one SMTP session
     
     Args:
         recipients: List of dicts with 'email' and 'name' keys
         channel_name: Name of the channel
         sender_name: Name of message sender
         message_preview: Preview of the message content
+        session: Open SMTPSession to reuse; one is opened for the batch if omitted
     
     Returns:
-        int: Number of successfully sent emails
+        List[dict]: Recipients whose email could not be sent
     """
-    sent_count = 0
-    
-    for recipient in recipients:
-        if send_new_message_notification(
-            recipient['email'],
-            recipient['name'],
-            channel_name,
-            sender_name,
-            message_preview
-        ):
-            sent_count += 1
-    
-    return sent_count
+    if not GMAIL_PASSWORD and session is None:
+        logger.warning("GMAIL_APP_PASSWORD not set - skipping email")
+        return list(recipients)
+    
+    failed = []
+    email = NewMessageEmail(channel_name, sender_name, message_preview)
+    smtp = session or SMTPSession()
+    
+    try:
+        for recipient in recipients:
+            if smtp.send(email.build(recipient['email'], recipient['name'])):
+                logger.info(f"Email sent to {recipient['email']}: {email.subject}")
+            else:
+                failed.append(recipient)
+    finally:
+        if session is None:
+            smtp.close()
+    
+    return failed
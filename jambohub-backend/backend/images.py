@@ -0,0 +1,170 @@
+# backend/images.py
+"""
+Resizing and re-encoding of uploaded photos
+
+Phone photos arrive as 3-10 MB JPEGs carrying EXIF (including GPS). Each
+upload is turned into a bounded display rendition and a small thumbnail,
+both WebP with the orientation applied and all metadata dropped; the
+original is not kept.
+
+Decoding and encoding are CPU-bound, so they run in a small process pool
+(spawned, not forked, since gunicorn workers are threaded) and request
+threads only wait on the result. If a pool process dies (say the kernel
+OOM-kills it), the pool is replaced and the upload retried once.
+
+Memory is bounded by MAX_PIXELS, checked against the size the decoder will
+actually allocate. JPEGs are decoded at a reduced scale, so phone photos of
+any resolution pass; other formats are decoded in full. At the limit, a
+render peaks at about 100 MB, and a file lock lets only one render run at
+a time across all gunicorn workers, so only one pool process is ever that
+large.
+
+Pillow is optional: without it process_upload() is never called and
+uploads are stored as sent, as before.
+"""
+
+import fcntl
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    from PIL import Image, ImageOps, ImageSequence
+    IMAGE_PROCESSING_ENABLED = True
+except ImportError as e:
+    IMAGE_PROCESSING_ENABLED = False
+    print(f"Image processing disabled, uploads stored as sent: {e}")
+
+DISPLAY_MAX_SIDE = int(os.getenv("IMAGE_DISPLAY_MAX_SIDE", "1600"))
+THUMB_MAX_SIDE = int(os.getenv("IMAGE_THUMB_MAX_SIDE", "640"))
+DISPLAY_QUALITY = 80
+THUMB_QUALITY = 70
+MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", "8000000"))  # decoded size; refuses decompression bombs
+MAX_SOURCE_PIXELS = 100_000_000  # Pillow's own header check (it refuses twice this)
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "1"))
+IMAGE_TIMEOUT_SECONDS = 60
+RENDER_LOCK_PATH = os.path.join(tempfile.gettempdir(), "jambohub-image-render.lock")
+
+THUMB_SUFFIX = "_thumb"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ImageWorkerUnavailable(Exception):
+    """The render process died twice in a row; the upload can be retried later"""
+
+
+def thumbnail_name(filename):
+    stem, _ = os.path.splitext(filename)
+    return f"{stem}{THUMB_SUFFIX}.webp"
+
+
+def _as_rgb(frame, source):
+    if frame.mode in ("RGB", "RGBA"):
+        return frame
+    return frame.convert("RGBA" if "transparency" in source.info or frame.mode in ("LA", "PA") else "RGB")
+
+
+def _render(src_path, dest_dir, stem):
+    """Runs in a pool process. Returns (display filename, thumbnail filename, width, height)"""
+    with open(RENDER_LOCK_PATH, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return _render_unlocked(src_path, dest_dir, stem)
+
+
+def _render_unlocked(src_path, dest_dir, stem):
+    Image.MAX_IMAGE_PIXELS = MAX_SOURCE_PIXELS
+    with Image.open(src_path) as img:
+        # MPO (multi-picture JPEG from phone cameras) also reports
+        # is_animated; only GIF and WebP frames are an animation
+        animated = getattr(img, "is_animated", False) and img.format in ("GIF", "WEBP")
+        if not animated:
+            # Let the JPEG decoder downscale while decoding; far cheaper than a
+            # full decode. The box keeps the photo's shape so both sides count
+            scale = max(img.size) / DISPLAY_MAX_SIDE
+            if scale > 1:
+                img.draft("RGB", (int(img.width / scale), int(img.height / scale)))
+        # Pillow itself only refuses images over twice MAX_IMAGE_PIXELS;
+        # img.size is now what decoding will allocate, so check it first
+        if img.width * img.height > MAX_PIXELS:
+            raise Image.DecompressionBombError(f"{img.width}x{img.height} is over the {MAX_PIXELS} pixel limit")
+
+        if not animated:
+            display = f"{stem}.webp"
+            # Shrink before rotating, so only one full-size decode is ever in
+            # memory; palette images are converted first (Pillow resizes
+            # them nearest-neighbour)
+            frame = _as_rgb(img, img) if img.mode in ("1", "P") else img
+            frame.thumbnail((DISPLAY_MAX_SIDE, DISPLAY_MAX_SIDE), Image.LANCZOS)
+            frame = _as_rgb(ImageOps.exif_transpose(frame), img)
+            frame.save(os.path.join(dest_dir, display), "WEBP", quality=DISPLAY_QUALITY, method=4)
+            width, height = frame.size
+        elif img.format == "GIF":
+            # Keep the animation; GIF carries no EXIF, so the file is served as sent
+            frame = _as_rgb(img.copy(), img)
+            display = f"{stem}.gif"
+            os.replace(src_path, os.path.join(dest_dir, display))
+            width, height = img.size
+        else:
+            # Animated WebP may carry EXIF/XMP chunks: re-encode the frames without them
+            display = f"{stem}.webp"
+            frames, durations = [], []
+            for shown in ImageSequence.Iterator(img):
+                durations.append(shown.info.get("duration", 100))
+                shown = shown.convert("RGBA")
+                shown.thumbnail((DISPLAY_MAX_SIDE, DISPLAY_MAX_SIDE), Image.LANCZOS)
+                frames.append(shown)
+            frames[0].save(os.path.join(dest_dir, display), "WEBP", save_all=True, append_images=frames[1:],
+                           duration=durations, loop=img.info.get("loop", 0), quality=DISPLAY_QUALITY, method=4)
+            width, height = frames[0].size
+            frame = frames[0]
+
+        thumb = thumbnail_name(display)
+        frame.thumbnail((THUMB_MAX_SIDE, THUMB_MAX_SIDE), Image.LANCZOS)
+        frame.save(os.path.join(dest_dir, thumb), "WEBP", quality=THUMB_QUALITY, method=4)
+
+    if os.path.exists(src_path):
+        os.remove(src_path)
+    return display, thumb, width, height
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(pool):
+    """Drop a broken pool so the next upload starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        # Another thread may already have replaced it
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def process_upload(src_path, dest_dir, stem):
+    """
+    Render display + thumbnail WebPs for the image at src_path into dest_dir,
+    then delete src_path. Returns (display filename, thumbnail filename,
+    width, height). Raises ValueError if the file isn't a usable image,
+    ImageWorkerUnavailable if rendering kept crashing the pool process.
+    """
+    for attempt in range(2):
+        pool = _get_pool()
+        try:
+            return pool.submit(_render, src_path, dest_dir, stem).result(timeout=IMAGE_TIMEOUT_SECONDS)
+        except BrokenProcessPool as e:
+            _discard_pool(pool)
+            if attempt:
+                raise ImageWorkerUnavailable(str(e)) from e
+        except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+            # PIL raises these for truncated, corrupt or oversized images
+            raise ValueError(f"Not a valid image: {e}") from e
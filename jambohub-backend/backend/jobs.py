@@ -0,0 +1,207 @@
+# backend/jobs.py
+"""
+Durable background job queue for JamboHub
+
+Jobs live in the notification_jobs table next to the rest of the data, so
+nothing is lost if a worker restarts mid-broadcast. Each gunicorn worker runs
+one JobWorker thread; workers claim jobs with a conditional UPDATE so a job
+only ever runs in one place. Failed jobs are retried with exponential backoff.
+"""
+
+import json
+import os
+import socket
+import threading
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from .models import SessionLocal, NotificationJob
+from . import maintenance
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 2.0          # seconds between queue checks when idle
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 30    # 30s, 60s, 120s, 240s ...
+BACKOFF_MAX_SECONDS = 15 * 60
+LEASE_SECONDS = 10 * 60      # running jobs older than this are assumed orphaned
+KEEP_FINISHED_DAYS = 7
+
+
+class RetryJob(Exception):
+    """
+    Raised by a handler to retry later. If payload is given it replaces the
+    job's payload, e.g. to retry only the recipients that failed.
+    """
+
+    def __init__(self, message, payload=None):
+        super().__init__(message)
+        self.payload = payload
+
+
+_handlers = {}
+_wake = threading.Event()
+_worker = None
+
+
+def register_handler(kind, handler):
+    """Register handler(payload: dict) for jobs of the given kind"""
+    _handlers[kind] = handler
+
+
+def enqueue(db, kind, payload):
+    """
+    Add a job to the session. It is committed with the caller's transaction,
+    so a job exists exactly when the data it refers to does.
+    """
+    job = NotificationJob(kind=kind, payload=json.dumps(payload), run_at=datetime.utcnow())
+    db.add(job)
+    return job
+
+
+def wake():
+    """Tell this process's worker there is work, instead of waiting for the next poll"""
+    _wake.set()
+
+
+def backoff_delay(attempts):
+    return min(BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)), BACKOFF_MAX_SECONDS)
+
+
+class JobWorker(threading.Thread):
+    """Drains notification_jobs in the background"""
+
+    def __init__(self):
+        super().__init__(name="job-worker", daemon=True)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    def run(self):
+        logger.info(f"Job worker {self.worker_id} started")
+        last_cleanup = None
+        while True:
+            try:
+                while self._run_one():
+                    pass
+                if last_cleanup is None or datetime.utcnow() - last_cleanup > timedelta(hours=1):
+                    self._cleanup()
+                    # Message retention rides on the same hourly tick
+                    maintenance.archive_expired()
+                    last_cleanup = datetime.utcnow()
+            except Exception as e:
+                logger.error(f"Job worker error: {e}")
+            _wake.wait(POLL_INTERVAL)
+            _wake.clear()
+
+    def _claim(self, db):
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=LEASE_SECONDS)
+        candidate = db.query(NotificationJob.id).filter(
+            ((NotificationJob.status == "pending") & (NotificationJob.run_at <= now)) |
+            ((NotificationJob.status == "running") & (NotificationJob.started_at < stale))
+        ).order_by(NotificationJob.id).first()
+        if not candidate:
+            return None
+
+        # Only one worker wins the conditional update
+        claimed = db.query(NotificationJob).filter(
+            NotificationJob.id == candidate.id,
+            ((NotificationJob.status == "pending") |
+             ((NotificationJob.status == "running") & (NotificationJob.started_at < stale)))
+        ).update({
+            NotificationJob.status: "running",
+            NotificationJob.started_at: now,
+            NotificationJob.locked_by: self.worker_id,
+            NotificationJob.attempts: NotificationJob.attempts + 1,
+        }, synchronize_session=False)
+        db.commit()
+        if not claimed:
+            return None
+        return db.query(NotificationJob).filter(NotificationJob.id == candidate.id).first()
+
+    def _run_one(self):
+        """Run the next due job; returns False when the queue is empty"""
+        db = SessionLocal()
+        try:
+            job = self._claim(db)
+            if job is None:
+                return False
+
+            handler = _handlers.get(job.kind)
+            try:
+                if handler is None:
+                    raise ValueError(f"No handler for job kind '{job.kind}'")
+                handler(json.loads(job.payload))
+            except Exception as e:
+                if isinstance(e, RetryJob) and e.payload is not None:
+                    job.payload = json.dumps(e.payload)
+                job.last_error = str(e)[:500]
+                job.locked_by = None
+                if job.attempts >= MAX_ATTEMPTS:
+                    job.status = "failed"
+                    job.finished_at = datetime.utcnow()
+                    logger.error(f"Job {job.id} ({job.kind}) failed permanently: {e}")
+                else:
+                    job.status = "pending"
+                    job.run_at = datetime.utcnow() + timedelta(seconds=backoff_delay(job.attempts))
+                    logger.warning(f"Job {job.id} ({job.kind}) attempt {job.attempts} failed, retrying: {e}")
+            else:
+                job.status = "done"
+                job.finished_at = datetime.utcnow()
+                job.locked_by = None
+            db.commit()
+            return True
+        finally:
+            db.close()
+
+    def _cleanup(self):
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(days=KEEP_FINISHED_DAYS)
+            db.query(NotificationJob).filter(
+                NotificationJob.status.in_(["done", "failed"]),
+                NotificationJob.finished_at < cutoff
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+def start_worker():
+    """Start this process's job worker (once)"""
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = JobWorker()
+        _worker.start()
+
+
+def queue_stats(db, sample_size=200):
+    """Queue depth by status and delivery latency of recently finished jobs"""
+    counts = dict(db.query(NotificationJob.status, func.count(NotificationJob.id)).group_by(NotificationJob.status).all())
+
+    oldest_pending = db.query(func.min(NotificationJob.created_at)).filter(NotificationJob.status == "pending").scalar()
+
+    recent = db.query(NotificationJob.created_at, NotificationJob.finished_at).filter(
+        NotificationJob.status == "done"
+    ).order_by(NotificationJob.finished_at.desc()).limit(sample_size).all()
+    latencies = sorted((finished - created).total_seconds() for created, finished in recent if created and finished)
+
+    def percentile(p):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 3)
+
+    return {
+        "pending": counts.get("pending", 0),
+        "running": counts.get("running", 0),
+        "done": counts.get("done", 0),
+        "failed": counts.get("failed", 0),
+        "oldestPendingSeconds": round((datetime.utcnow() - oldest_pending).total_seconds(), 1) if oldest_pending else None,
+        "latency": {
+            "sample": len(latencies),
+            "p50Seconds": percentile(0.5),
+            "p95Seconds": percentile(0.95),
+            "maxSeconds": round(latencies[-1], 3) if latencies else None,
+        },
+    }
@@ -0,0 +1,195 @@
+# backend/maintenance.py
+"""
+Message retention, archiving and database compaction
+
+Channels with retention_days set have their unpinned messages older than
+that moved out of `messages` into message_archive_blocks: runs of up to
+ARCHIVE_BLOCK_SIZE messages from one channel, stored as zlib-compressed
+JSON (chat text compresses several-fold in blocks, hardly at all one
+message at a time). message_archive maps each original id to its block,
+and the contentless message_archive_fts keeps archived text searchable.
+That keeps `messages`, its indexes and messages_fts down to the live
+working set.
+
+The job worker archives hourly. Compaction (incremental vacuum, FTS
+optimize, ANALYZE, WAL truncate) rewrites pages, so it is a command to run
+off-peak:
+
+    python -m backend.maintenance               # archive, then compact
+    python -m backend.maintenance --archive     # archive only
+    python -m backend.maintenance --compact     # compact only
+
+On Fly: fly ssh console -C "python -m backend.maintenance"
+"""
+
+import argparse
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select, text
+
+from .models import SessionLocal, engine, ArchiveBlock, ArchivedMessage, Channel, Message
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BLOCK_SIZE = 200
+
+
+def _archive_block(db, channel_id, cutoff):
+    """Move one block's worth of expired messages; returns how many moved"""
+    # DELETE ... RETURNING claims the rows under the write lock, so two
+    # workers archiving at once can't both take the same messages
+    expired = (
+        select(Message.id)
+        .where(Message.channel_id == channel_id, Message.created_at < cutoff, Message.pinned.isnot(True))
+        .order_by(Message.id)
+        .limit(ARCHIVE_BLOCK_SIZE)
+    )
+    rows = db.execute(
+        delete(Message).where(Message.id.in_(expired)).returning(
+            Message.id, Message.user_id, Message.content, Message.image_url, Message.created_at
+        )
+    ).all()
+    if not rows:
+        return 0
+    rows.sort(key=lambda r: r.id)
+
+    block = ArchiveBlock(
+        channel_id=channel_id,
+        first_created_at=rows[0].created_at,
+        last_created_at=rows[-1].created_at,
+        message_count=len(rows),
+        data=zlib.compress(json.dumps([{
+            "id": r.id,
+            "userId": r.user_id,
+            "content": r.content,
+            "imageUrl": r.image_url,
+            "createdAt": r.created_at.isoformat(),
+        } for r in rows]).encode("utf-8"), 9),
+    )
+    db.add(block)
+    db.flush()
+    db.execute(insert(ArchivedMessage), [
+        {"message_id": r.id, "block_id": block.id, "channel_id": channel_id, "created_at": r.created_at}
+        for r in rows
+    ])
+    db.execute(
+        text("INSERT INTO message_archive_fts(rowid, content) VALUES (:id, :content)"),
+        [{"id": r.id, "content": r.content} for r in rows]
+    )
+    db.commit()
+    return len(rows)
+
+
+def archive_expired(now=None):
+    """Archive expired messages in every channel with a retention period; returns {channel_id: count}"""
+    now = now or datetime.utcnow()
+    db = SessionLocal()
+    try:
+        policies = db.query(Channel.id, Channel.retention_days).filter(Channel.retention_days.isnot(None)).all()
+        archived = {}
+        for channel_id, days in policies:
+            cutoff = now - timedelta(days=days)
+            total = 0
+            while True:
+                moved = _archive_block(db, channel_id, cutoff)
+                total += moved
+                if moved < ARCHIVE_BLOCK_SIZE:
+                    break
+            if total:
+                archived[channel_id] = total
+                logger.info(f"Archived {total} messages from {channel_id}")
+        return archived
+    finally:
+        db.close()
+
+
+def load_archived(db, message_ids):
+    """Archived message dicts (as stored) for the given ids, keyed by id"""
+    wanted = set(message_ids)
+    if not wanted:
+        return {}
+    block_ids = {
+        row.block_id for row in
+        db.query(ArchivedMessage.block_id).filter(ArchivedMessage.message_id.in_(wanted))
+    }
+    found = {}
+    for block in db.query(ArchiveBlock).filter(ArchiveBlock.id.in_(block_ids)):
+        for message in json.loads(zlib.decompress(block.data)):
+            if message["id"] in wanted:
+                message["channelId"] = block.channel_id
+                found[message["id"]] = message
+    return found
+
+
+def iter_archive(db, channel_id):
+    """Every archived message in a channel, oldest first"""
+    blocks = db.query(ArchiveBlock.id).filter(ArchiveBlock.channel_id == channel_id).order_by(ArchiveBlock.id).all()
+    for (block_id,) in blocks:
+        # One block in memory at a time, however large the archive
+        data = db.query(ArchiveBlock.data).filter(ArchiveBlock.id == block_id).scalar()
+        yield from json.loads(zlib.decompress(data))
+
+
+def delete_channel_archive(db, channel_id):
+    """Drop a channel's archive in the caller's transaction"""
+    # A contentless FTS5 row can only be removed by repeating its text
+    for message in iter_archive(db, channel_id):
+        db.execute(
+            text("INSERT INTO message_archive_fts(message_archive_fts, rowid, content) VALUES ('delete', :id, :content)"),
+            {"id": message["id"], "content": message["content"]}
+        )
+    db.query(ArchivedMessage).filter(ArchivedMessage.channel_id == channel_id).delete(synchronize_session=False)
+    db.query(ArchiveBlock).filter(ArchiveBlock.channel_id == channel_id).delete(synchronize_session=False)
+
+
+def database_size(conn):
+    page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+    return {
+        "bytes": conn.exec_driver_sql("PRAGMA page_count").scalar() * page_size,
+        "freeBytes": conn.exec_driver_sql("PRAGMA freelist_count").scalar() * page_size,
+    }
+
+
+def compact():
+    """Return free pages to the filesystem, merge FTS segments and refresh planner stats"""
+    with engine.connect() as conn:
+        before = database_size(conn)
+        conn.exec_driver_sql("INSERT INTO messages_fts(messages_fts) VALUES ('optimize')")
+        conn.exec_driver_sql("INSERT INTO message_archive_fts(message_archive_fts) VALUES ('optimize')")
+        conn.exec_driver_sql("ANALYZE")
+        conn.commit()
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+            # Databases created before auto_vacuum=INCREMENTAL need one full
+            # rewrite for the setting to stick; later runs are incremental
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        else:
+            # incremental_vacuum frees one page per step; executescript steps
+            # it to completion where execute() would stop after the first
+            conn.connection.driver_connection.executescript("PRAGMA incremental_vacuum;")
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        after = database_size(conn)
+    return {"before": before, "after": after}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive expired messages and compact the database")
+    parser.add_argument("--archive", action="store_true", help="only archive")
+    parser.add_argument("--compact", action="store_true", help="only compact")
+    args = parser.parse_args()
+    run_all = not (args.archive or args.compact)
+
+    if args.archive or run_all:
+        archived = archive_expired()
+        print(f"Archived {sum(archived.values())} messages" + "".join(f"\n  {c}: {n}" for c, n in archived.items()))
+    if args.compact or run_all:
+        sizes = compact()
+        print(f"Database {sizes['before']['bytes'] / 1e6:.1f} MB ({sizes['before']['freeBytes'] / 1e6:.1f} MB free) "
+              f"-> {sizes['after']['bytes'] / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
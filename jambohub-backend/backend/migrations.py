@@ -0,0 +1,142 @@
+# backend/migrations.py
+"""
+Versioned schema migrations
+
+The schema version lives in SQLite's user_version header field, so an
+up-to-date database costs one PRAGMA read at startup: no create_all, no
+DDL and no seed check. gunicorn.conf.py runs migrate() in the master
+before workers fork, so a deploy migrates once; the workers' own call
+then finds nothing to do. A file lock next to the database keeps two
+processes from migrating at once when there is no master (python -m
+backend.app, scripts).
+
+To change the schema, append a step to MIGRATIONS; never edit or reorder
+shipped ones. A new database runs every step in order, and step 1 already
+creates tables from the current models, so later steps must tolerate
+their change being present (add_column and IF NOT EXISTS do).
+
+    python -m backend.migrations            # apply pending steps
+    python -m backend.migrations --status   # show current and latest version
+"""
+
+import argparse
+import fcntl
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from .models import (
+    Base, engine, db_path, seed_default_data,
+    VERSION_TRIGGERS, MESSAGE_FTS_DDL, ARCHIVE_FTS_DDL,
+)
+
+
+def add_column(conn, table, column, ddl):
+    existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def baseline(conn):
+    """Everything init_db used to do on every boot"""
+    # Only takes effect on a new file; existing ones switch over with the
+    # one-off VACUUM in `python -m backend.maintenance`
+    conn.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+    Base.metadata.create_all(bind=conn)
+    conn.execute(text("PRAGMA journal_mode=WAL"))
+    add_column(conn, "units", "youth_capacity", "INTEGER")
+    add_column(conn, "channels", "retention_days", "INTEGER")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_messages_channel_created ON messages(channel_id, created_at DESC)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)"))
+    # Admin user list: name ordering/keyset paging, prefix search and filters
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_users_name ON users(lower(last_name), lower(first_name), id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_users_first_name ON users(lower(first_name))"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_users_username_lower ON users(lower(username))"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_users_unit_patrol ON users(unit, patrol)"))
+    for name, table, event, key in VERSION_TRIGGERS:
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN "
+            f"INSERT INTO data_versions (key, version) VALUES ({key}, 1) "
+            f"ON CONFLICT(key) DO UPDATE SET version = version + 1; END"
+        ))
+    # Index existing messages the first time the FTS table is created
+    fts_exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'")).first()
+    for ddl in MESSAGE_FTS_DDL:
+        conn.execute(text(ddl))
+    if not fts_exists:
+        conn.execute(text("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')"))
+    for ddl in ARCHIVE_FTS_DDL:
+        conn.execute(text(ddl))
+    conn.commit()
+    seed_default_data()
+
+
+def message_order_index(conn):
+    """Messages page on (created_at, id); carry id in the index so ties don't need a sort"""
+    columns = [row[2] for row in conn.execute(text("PRAGMA index_info(idx_messages_channel_created)"))]
+    if columns == ["channel_id", "created_at", "id"]:
+        return
+    conn.execute(text("DROP INDEX IF EXISTS idx_messages_channel_created"))
+    conn.execute(text("CREATE INDEX idx_messages_channel_created ON messages(channel_id, created_at DESC, id DESC)"))
+    conn.commit()
+
+
+# (version, description, step(conn)); the database is at version N once step N has run
+MIGRATIONS = [
+    (1, "baseline schema, indexes, triggers, full-text search and seed data", baseline),
+    (2, "order the channel message index by (created_at, id)", message_order_index),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+@contextmanager
+def migration_lock():
+    with open(f"{db_path}.migrate.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def migrate():
+    """Apply pending migrations; returns the versions applied"""
+    with engine.connect() as conn:
+        if schema_version(conn) >= LATEST_VERSION:
+            return []
+
+    applied = []
+    with migration_lock(), engine.connect() as conn:
+        # Re-read under the lock: another process may have just finished
+        version = schema_version(conn)
+        for number, description, step in MIGRATIONS:
+            if number <= version:
+                continue
+            print(f"[Database] Migration {number}: {description}")
+            step(conn)
+            conn.execute(text(f"PRAGMA user_version = {number}"))
+            conn.commit()
+            applied.append(number)
+    print(f"[Database] Schema at version {LATEST_VERSION}")
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument("--status", action="store_true", help="show versions without migrating")
+    args = parser.parse_args()
+
+    if args.status:
+        with engine.connect() as conn:
+            print(f"{db_path}: version {schema_version(conn)}, latest {LATEST_VERSION}")
+        return
+    applied = migrate()
+    print(f"Applied {applied}" if applied else "Already up to date")
+
+
+if __name__ == "__main__":
+    main()
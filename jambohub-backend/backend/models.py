@@ -2,21 +2,85 @@
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, String, Boolean, DateTime, Text,
-    ForeignKey, create_engine, text
+    ForeignKey, Index, LargeBinary, create_engine, event
 )
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 import os
 
-# Use persistent volume if available, fallback to local
-db_path = "/data/jambohub.db" if os.path.exists("/data") else "./jambohub.db"
+# Use persistent volume if available, fallback to local; DATABASE_PATH
+# overrides both (benchmarks use it to stay off the real database)
+db_path = os.getenv("DATABASE_PATH") or ("/data/jambohub.db" if os.path.exists("/data") else "./jambohub.db")
 DATABASE_URL = f"sqlite:///{db_path}"
 
+# Two engines on the same file. With WAL, readers never block on the
+# writer, but SQLite still allows only one write transaction at a time:
+#
+#   read_engine  (ReadSessionLocal) - query_only connections, borrowed for the
+#                length of a query. Open message streams hold a thread but no
+#                connection, so this is far smaller than the thread count;
+#                overflow absorbs bursts.
+#   engine       (SessionLocal)     - a few read-write connections; handlers
+#                that change data queue here for their turn instead of piling
+#                up on the SQLite lock. Overflow covers the job worker, which
+#                holds one while its handler opens another.
+#
+# Handlers that only read use ReadSessionLocal; anything that may commit
+# uses SessionLocal.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = 5
+DB_WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", "4"))
+DB_WRITE_MAX_OVERFLOW = 2
+
 Base = declarative_base()
 engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
+    DATABASE_URL, connect_args={"check_same_thread": False},
+    pool_size=DB_WRITE_POOL_SIZE, max_overflow=DB_WRITE_MAX_OVERFLOW
 )
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+# query_only rather than a mode=ro URI: a read-only open can't create the
+# WAL index (-shm) file when no read-write connection has the file open yet
+read_engine = create_engine(
+    DATABASE_URL, connect_args={"check_same_thread": False},
+    pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW
+)
+ReadSessionLocal = sessionmaker(bind=read_engine, autocommit=False, autoflush=False)
+
+# Applied to every pooled connection as it is opened; apart from
+# journal_mode (set once in init_db, stored in the file) SQLite PRAGMAs
+# are per-connection. busy_timeout makes a writer wait for the lock held by
+# the other worker instead of failing with "database is locked".
+# cache_size is private heap per connection, so it multiplies by every pooled
+# connection in every worker; mmap pages are the shared, reclaimable OS page
+# cache and serve most reads, so the per-connection cache stays small.
+SQLITE_PRAGMAS = {
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": "MEMORY",
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KIB", "2048")),  # negative = KiB
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),  # safe in WAL mode
+}
+
+
+@event.listens_for(engine, "connect")
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+@event.listens_for(read_engine, "connect")
+def apply_read_only_pragmas(dbapi_connection, connection_record):
+    apply_sqlite_pragmas(dbapi_connection, connection_record)
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
 
 class User(Base):
     """User account for JamboHub"""
@@ -78,6 +142,7 @@ class Unit(Base):
     
     id = Column(String, primary_key=True, index=True)
     name = Column(String, nullable=False, unique=True)
+    youth_capacity = Column(Integer, nullable=True)  # Youth slots; None = no limit set
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -96,6 +161,7 @@ class Channel(Base):
     email_notifications = Column(Boolean, default=False)  # Only send emails if True
     push_notifications = Column(Boolean, default=True)   # Send push by default
     active = Column(Boolean, default=True)
+    retention_days = Column(Integer, nullable=True)  # unpinned messages older than this are archived; None keeps all
     created_at = Column(DateTime, default=datetime.utcnow)
     messages = relationship("Message", back_populates="channel")
 
@@ -116,6 +182,29 @@ class Message(Base):
     author = relationship("User", back_populates="messages")
 
 
+class ArchiveBlock(Base):
+    """A run of archived messages from one channel, stored as zlib-compressed JSON"""
+    __tablename__ = "message_archive_blocks"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    channel_id = Column(String, nullable=False, index=True)
+    first_created_at = Column(DateTime, nullable=False)
+    last_created_at = Column(DateTime, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ArchivedMessage(Base):
+    """Where an archived message lives; its id is the original message id"""
+    __tablename__ = "message_archive"
+    
+    message_id = Column(Integer, primary_key=True, autoincrement=False)
+    block_id = Column(Integer, nullable=False, index=True)
+    channel_id = Column(String, nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False)
+
+
 class InfoCard(Base):
     """Dynamic content cards for the home/info page"""
     __tablename__ = "info_cards"
@@ -147,24 +236,81 @@ class PushSubscription(Base):
     user = relationship("User")
 
 
-def init_db():
-    """Initialize database with tables and seed data"""
-    print("[Database] Creating tables...")
-    Base.metadata.create_all(bind=engine)
+class NotificationJob(Base):
+    """Queued email/push delivery, drained by the background job worker"""
+    __tablename__ = "notification_jobs"
     
-    try:
-        with engine.connect() as conn:
-            conn.execute(text("PRAGMA journal_mode=WAL"))
-            conn.execute(text("PRAGMA cache_size=-20000"))
-            conn.execute(text("PRAGMA synchronous=NORMAL"))
-            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_messages_channel_created ON messages(channel_id, created_at DESC)"))
-            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)"))
-            conn.commit()
-        print("[Database] Initialization complete")
-    except Exception as e:
-        print(f"[Database] Warning: {e}")
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String, nullable=False)  # channel_email, push
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String, nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # not before (backoff)
+    locked_by = Column(String, nullable=True)  # host:pid of the worker running it
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("idx_notification_jobs_status_run_at", "status", "run_at"),
+    )
+
+
+class DataVersion(Base):
+    """Change counters bumped by triggers; used as cheap ETag validators"""
+    __tablename__ = "data_versions"
     
-    seed_default_data()
+    key = Column(String, primary_key=True)  # table name, or "messages:<channel_id>"
+    version = Column(Integer, nullable=False, default=0)
+
+
+# (trigger name, table, event, version key expression)
+VERSION_TRIGGERS = [
+    ("trg_messages_version_insert", "messages", "INSERT", "'messages:' || NEW.channel_id"),
+    ("trg_messages_version_update", "messages", "UPDATE", "'messages:' || NEW.channel_id"),
+    ("trg_messages_version_delete", "messages", "DELETE", "'messages:' || OLD.channel_id"),
+    ("trg_channels_version_insert", "channels", "INSERT", "'channels'"),
+    ("trg_channels_version_update", "channels", "UPDATE", "'channels'"),
+    ("trg_channels_version_delete", "channels", "DELETE", "'channels'"),
+    ("trg_users_version_insert", "users", "INSERT", "'users'"),
+    ("trg_users_version_update", "users", "UPDATE", "'users'"),
+    ("trg_users_version_delete", "users", "DELETE", "'users'"),
+    ("trg_info_cards_version_insert", "info_cards", "INSERT", "'info_cards'"),
+    ("trg_info_cards_version_update", "info_cards", "UPDATE", "'info_cards'"),
+    ("trg_info_cards_version_delete", "info_cards", "DELETE", "'info_cards'"),
+    ("trg_units_version_insert", "units", "INSERT", "'units'"),
+    ("trg_units_version_update", "units", "UPDATE", "'units'"),
+    ("trg_units_version_delete", "units", "DELETE", "'units'"),
+]
+
+# Full-text index over message content. It's an external-content table (the
+# text lives only in messages) kept in sync by triggers; pin toggles and
+# other non-content updates don't touch it.
+MESSAGE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+    "content, content='messages', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS trg_messages_fts_insert AFTER INSERT ON messages BEGIN "
+    "INSERT INTO messages_fts(rowid, content) VALUES (NEW.id, NEW.content); END",
+    "CREATE TRIGGER IF NOT EXISTS trg_messages_fts_delete AFTER DELETE ON messages BEGIN "
+    "INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content); END",
+    "CREATE TRIGGER IF NOT EXISTS trg_messages_fts_update AFTER UPDATE OF content ON messages BEGIN "
+    "INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', OLD.id, OLD.content); "
+    "INSERT INTO messages_fts(rowid, content) VALUES (NEW.id, NEW.content); END",
+]
+
+# Archived text lives compressed in message_archive_blocks, so the archive's
+# index is contentless: it maps words to message ids and nothing more
+ARCHIVE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS message_archive_fts USING fts5("
+    "content, content='', tokenize='porter unicode61')",
+]
+
+
+def init_db():
+    """Bring the schema up to date and seed a new database (see migrations.py)"""
+    from .migrations import migrate
+    migrate()
 
 
 def seed_default_data():
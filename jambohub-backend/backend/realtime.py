@@ -0,0 +1,138 @@
+# backend/realtime.py
+"""
+Real-time message fan-out for Server-Sent Events streams
+
+Each gunicorn worker runs one watcher thread that polls the messages table
+for rows newer than the last id it has seen. SQLite is the bus: a message
+committed by either worker is picked up by both watchers, serialized once,
+and handed to every stream in that worker subscribed to the channel.
+The watcher only runs queries while at least one stream is open.
+"""
+
+import queue
+import threading
+import logging
+
+from sqlalchemy.orm import joinedload
+
+from .models import ReadSessionLocal, Message
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.3  # seconds between checks while streams are open
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """A single stream's view of the hub"""
+
+    def __init__(self, channel_id):
+        self.channel_id = channel_id
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def get(self, timeout):
+        """Next serialized message, or None if nothing arrived within timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class MessageHub:
+    """Per-process fan-out of new messages to channel subscribers"""
+
+    def __init__(self, serialize, poll_interval=POLL_INTERVAL):
+        self._serialize = serialize
+        self._poll_interval = poll_interval
+        self._subscribers = {}  # channel_id -> set of Subscription
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._last_id = None
+
+    def subscribe(self, channel_id):
+        """
+        Register a stream for a channel.
+
+        Every message committed after this returns is delivered to the
+        subscription, so callers should subscribe first and then catch up
+        from the database, skipping ids they have already sent.
+        """
+        sub = Subscription(channel_id)
+        with self._lock:
+            if self._last_id is None:
+                self._last_id = self._max_message_id()
+            self._subscribers.setdefault(channel_id, set()).add(sub)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="message-hub", daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.channel_id)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.channel_id]
+
+    def notify(self):
+        """Wake the watcher now instead of at the next poll (same-worker posts)"""
+        self._wake.set()
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._poll_interval)
+            self._wake.clear()
+            with self._lock:
+                if not self._subscribers:
+                    # Nobody listening - forget the cursor so we don't replay
+                    # history when the next stream opens
+                    self._last_id = None
+                    continue
+            try:
+                self._poll()
+            except Exception as e:
+                logger.error(f"Message hub poll failed: {e}")
+
+    def _max_message_id(self):
+        db = ReadSessionLocal()
+        try:
+            return db.query(Message.id).order_by(Message.id.desc()).limit(1).scalar() or 0
+        finally:
+            db.close()
+
+    def _poll(self):
+        db = ReadSessionLocal()
+        try:
+            messages = (
+                db.query(Message)
+                .options(joinedload(Message.author))
+                .filter(Message.id > self._last_id)
+                .order_by(Message.id.asc())
+                .all()
+            )
+            if not messages:
+                return
+            self._last_id = messages[-1].id
+
+            for msg in messages:
+                with self._lock:
+                    subs = list(self._subscribers.get(msg.channel_id, ()))
+                if not subs:
+                    continue
+                event = self._serialize(msg, msg.author)
+                for sub in subs:
+                    try:
+                        sub.queue.put_nowait(event)
+                    except queue.Full:
+                        # Slow consumer - the stream closes and the client
+                        # catches up from the DB when it reconnects
+                        sub.overflowed = True
+        finally:
+            db.close()
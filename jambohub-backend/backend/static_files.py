@@ -0,0 +1,95 @@
+# backend/static_files.py
+"""
+Serving of files that don't change while the process runs
+
+The built frontend is replaced only by a deploy (which restarts the
+process) and uploads are written once under a fresh uuid, so a file's
+size, mtime, type and precompressed variants can be resolved once and
+kept. Repeat requests then skip the filesystem entirely: If-None-Match is
+answered from the cached ETag, and SPA routes that aren't files are
+remembered as misses.
+
+Responses go through werkzeug's send_file, which handles Range and
+If-Range. A sibling "<file>.br" or "<file>.gz" is sent instead when the
+client accepts that encoding.
+"""
+
+import mimetypes
+import os
+import stat as stat_module
+import threading
+
+from flask import Response, request, send_file
+from werkzeug.security import safe_join
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Preferred first
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+class StaticFile:
+    __slots__ = ("path", "mimetype", "etag", "variants")
+
+    def __init__(self, path, stat):
+        self.path = path
+        self.mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.etag = f"{int(stat.st_mtime)}-{stat.st_size:x}"
+        # (encoding, path, etag) for each precompressed copy on disk
+        self.variants = [
+            (encoding, path + suffix, f"{self.etag}-{encoding}")
+            for encoding, suffix in PRECOMPRESSED
+            if os.path.isfile(path + suffix)
+        ]
+
+
+class StaticFiles:
+    def __init__(self, root, cache_misses=True, max_entries=10000):
+        self.root = root
+        self._cache_misses = cache_misses
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}  # relative path -> StaticFile, or None for a known miss
+
+    def resolve(self, relpath):
+        """StaticFile for relpath under root, or None if there is no such file"""
+        with self._lock:
+            if relpath in self._entries:
+                return self._entries[relpath]
+
+        path = safe_join(self.root, relpath)
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            stat = None
+        entry = StaticFile(path, stat) if stat and stat_module.S_ISREG(stat.st_mode) else None
+
+        # Uploads keep appearing, so their misses must not stick
+        if entry or self._cache_misses:
+            with self._lock:
+                if len(self._entries) >= self._max_entries:
+                    self._entries.clear()
+                self._entries[relpath] = entry
+        return entry
+
+    def send(self, file, cache_control):
+        """Response for file, honouring Accept-Encoding, If-None-Match and Range"""
+        path, etag, encoding = file.path, file.etag, None
+        for variant_encoding, variant_path, variant_etag in file.variants:
+            if request.accept_encodings[variant_encoding]:
+                path, etag, encoding = variant_path, variant_etag, variant_encoding
+                break
+
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+        else:
+            response = send_file(path, mimetype=file.mimetype, etag=etag, conditional=True)
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+
+        response.headers["Cache-Control"] = cache_control
+        if file.variants:
+            response.vary.add("Accept-Encoding")
+        return response
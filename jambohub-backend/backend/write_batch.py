@@ -0,0 +1,184 @@
+# backend/write_batch.py
+"""
+Group commit for small, hot writes (message posts, push subscriptions)
+
+SQLite commits one transaction at a time. Every write transaction takes the
+single write lock (other connections wait on it for up to busy_timeout),
+appends its frames and a commit record to the WAL and hands the lock on.
+With synchronous=NORMAL in WAL mode a commit doesn't fsync; only
+checkpoints do. So the cost is the number of write transactions and the
+lock hand-offs between pool connections, not disk syncs. When a few
+hundred patrol leaders post at once, that cost dominates. Instead, each
+process funnels these writes to one writer thread: it takes the first
+pending write, waits up to WRITE_BATCH_WINDOW_MS for more, applies them
+all in a single session and commits once. Each caller blocks until the
+commit that holds its write has landed, so a 201 still means the row is
+committed.
+
+A write the writer hasn't picked up within WRITE_TIMEOUT_SECONDS is
+cancelled and the caller gets WriteTimeout (a 503): it never runs, so the
+client can safely send it again. Once the writer has taken a write, the
+caller waits for its commit to finish either way, so it never reports a
+failure for a write that then lands.
+
+A write is a function fn(db) that adds to the session and returns the
+caller's result (after db.flush() if it needs generated ids). It runs on
+the writer thread, so it must be quick: no network, no hashing. If a
+batch fails, it is rolled back and every write in it is retried alone, so
+one bad write doesn't fail its neighbours.
+
+Set WRITE_BATCHING=0 to commit each write in the caller's thread instead.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturesTimeout
+
+from .models import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCHING = os.getenv("WRITE_BATCHING", "1") != "0"
+WRITE_BATCH_WINDOW_MS = float(os.getenv("WRITE_BATCH_WINDOW_MS", "3"))
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "200"))
+WRITE_TIMEOUT_SECONDS = 30
+WRITE_RETRY_AFTER_SECONDS = 5
+
+
+class WriteTimeout(Exception):
+    """The write waited too long for the writer and was dropped unrun"""
+
+
+class WriteBatcher:
+    def __init__(self, enabled=WRITE_BATCHING, window_ms=WRITE_BATCH_WINDOW_MS, max_batch=WRITE_BATCH_MAX,
+                 timeout=WRITE_TIMEOUT_SECONDS):
+        self._enabled = enabled
+        self._timeout = timeout
+        self._window = window_ms / 1000
+        self._max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._commits = 0
+        self._writes = 0
+        self._largest_batch = 0
+        self._split_batches = 0
+
+    def submit(self, fn):
+        """Run fn(db) in a committed transaction and return its result"""
+        if not self._enabled:
+            return self._commit_one(fn)
+
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((fn, future))
+        try:
+            return future.result(timeout=self._timeout)
+        except FuturesTimeout:
+            # Still queued: cancel it so the writer skips it. Already taken:
+            # it is being committed, so wait for the real outcome.
+            if future.cancel():
+                raise WriteTimeout()
+            return future.result()
+
+    def stats(self):
+        with self._stats_lock:
+            elapsed = max(time.monotonic() - self._started_at, 1e-9)
+            return {
+                "enabled": self._enabled,
+                "windowMs": self._window * 1000,
+                "commits": self._commits,
+                "writes": self._writes,
+                "averageBatch": round(self._writes / self._commits, 2) if self._commits else None,
+                "largestBatch": self._largest_batch,
+                "splitBatches": self._split_batches,
+                "commitsPerSecond": round(self._commits / elapsed, 2),
+                "writesPerSecond": round(self._writes / elapsed, 2),
+            }
+
+    def _record(self, commits, writes, largest=0, split=False):
+        with self._stats_lock:
+            self._commits += commits
+            self._writes += writes
+            self._largest_batch = max(self._largest_batch, largest)
+            self._split_batches += split
+
+    def _ensure_thread(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-batcher", daemon=True)
+                self._thread.start()
+
+    def _commit_one(self, fn):
+        db = SessionLocal()
+        try:
+            result = fn(db)
+            db.commit()
+        finally:
+            db.close()
+        self._record(1, 1, 1)
+        return result
+
+    def _take(self, timeout=None):
+        """Next write whose caller is still waiting; cancelled ones are dropped"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if deadline is None:
+                item = self._queue.get()
+            else:
+                remaining = deadline - time.monotonic()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            if item[1].set_running_or_notify_cancel():
+                return item
+
+    def _run(self):
+        while True:
+            batch = [self._take()]
+            deadline = time.monotonic() + self._window
+            while len(batch) < self._max_batch:
+                try:
+                    batch.append(self._take(deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            try:
+                self._commit_batch(batch)
+            except Exception as e:
+                # Never let the writer thread die with callers waiting on it
+                logger.error(f"Write batch failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit_batch(self, batch):
+        db = SessionLocal()
+        try:
+            results = [fn(db) for fn, _ in batch]
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            logger.warning(f"Write batch of {len(batch)} failed, retrying singly: {e}")
+            self._record(0, 0, split=True)
+        else:
+            self._record(1, len(batch), len(batch))
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            return
+        finally:
+            db.close()
+
+        for fn, future in batch:
+            try:
+                future.set_result(self._commit_one(fn))
+            except Exception as e:
+                future.set_exception(e)
+
+
+write_batcher = WriteBatcher()
@@ -0,0 +1,115 @@
+# benchmarks/bench_archive.py
+"""
+Hot-table size before and after archiving and compaction.
+
+Fills a throwaway database with --messages messages spread evenly over the
+last --days days, sets a --retention day policy on every channel, then
+runs the archive and compaction. Reports the on-disk size of the hot
+tables (messages, its indexes, messages_fts) and of the archive, plus
+/api/search latency for a common word before and after.
+
+Run from jambohub-backend/:
+    python -m benchmarks.bench_archive --messages 100000 --days 120 --retention 14
+"""
+
+import argparse
+import random
+import time
+import logging
+from datetime import datetime, timedelta
+
+from benchmarks.server import use_scratch_database
+
+use_scratch_database()
+
+from backend.app import app
+from backend.auth import create_token
+from backend.models import SessionLocal, Channel, Message, engine
+from backend import maintenance
+
+logging.disable(logging.ERROR)
+
+WORDS = (
+    "bus leaves summit lot sharp bring water rain layer badge patrol merit badge session "
+    "dinner lunch breakfast campsite tent inspection swim check arena show shuttle gate "
+    "trading post flag ceremony chaplain service hike zipline climbing rifle archery"
+).split()
+
+HOT = ("messages", "ix_messages_id", "ix_messages_channel_id", "ix_messages_user_id", "ix_messages_created_at",
+       "idx_messages_channel_created", "messages_fts_data", "messages_fts_idx", "messages_fts_docsize",
+       "messages_fts_config")
+ARCHIVE = ("message_archive_blocks", "message_archive", "message_archive_fts_data", "message_archive_fts_idx",
+           "message_archive_fts_docsize", "message_archive_fts_config")
+
+
+def fill(count, days):
+    db = SessionLocal()
+    channel_ids = [c.id for c in db.query(Channel)]
+    db.close()
+    rng = random.Random(1)
+    start = datetime.utcnow() - timedelta(days=days)
+    step = days * 86400 / count
+    rows = [{
+        "channel_id": rng.choice(channel_ids),
+        "user_id": "admin1",
+        "content": " ".join(rng.choices(WORDS, k=rng.randint(6, 30))).capitalize() + ".",
+        "pinned": False,
+        "created_at": start + timedelta(seconds=i * step),
+    } for i in range(count)]
+    with engine.begin() as conn:
+        conn.execute(Message.__table__.insert(), rows)
+
+
+def sizes():
+    with engine.connect() as conn:
+        usage = dict(conn.exec_driver_sql("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").all())
+        total = maintenance.database_size(conn)["bytes"]
+    return sum(usage.get(n, 0) for n in HOT), sum(usage.get(n, 0) for n in ARCHIVE), total
+
+
+def search_ms(client, headers, repeat=20):
+    timings = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        client.get("/api/search", query_string={"q": "patrol"}, headers=headers)
+        timings.append(time.perf_counter() - t)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--retention", type=int, default=14)
+    args = parser.parse_args()
+
+    fill(args.messages, args.days)
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {create_token('admin1', 'admin')}"}
+
+    def report(label):
+        hot, archive, total = sizes()
+        print(f"{label:<16} {hot / 1e6:>8.1f} {archive / 1e6:>9.1f} {total / 1e6:>8.1f} {search_ms(client, headers):>10.1f}")
+
+    print(f"messages={args.messages} days={args.days} retention={args.retention}")
+    print(f"{'':<16} {'hot MB':>8} {'archive MB':>9} {'file MB':>8} {'search ms':>10}")
+    report("before")
+
+    db = SessionLocal()
+    db.query(Channel).update({Channel.retention_days: args.retention})
+    db.commit()
+    db.close()
+    start = time.perf_counter()
+    archived = sum(maintenance.archive_expired().values())
+    archive_seconds = time.perf_counter() - start
+    report("archived")
+
+    start = time.perf_counter()
+    maintenance.compact()
+    compact_seconds = time.perf_counter() - start
+    report("compacted")
+    print(f"\narchived {archived} messages in {archive_seconds:.1f}s, compacted in {compact_seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_email_render.py
+"""
+CPU time and peak allocation to render and serialize a new-message email for N recipients.
+
+"per recipient" renders the template for every recipient, the way a
+one-off send_new_message_notification call does. "shared" renders once per
+post with NewMessageEmail and only joins in each recipient's name, the way
+send_bulk_channel_notification does. Both build and serialize an
+EmailMessage per recipient; compare us/recipient with the per-message time
+from bench_smtp to see whether building is worth optimising further.
+
+Run from jambohub-backend/:
+    python -m benchmarks.bench_email_render --recipients 500
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from backend.email_service import NewMessageEmail
+
+CHANNEL = "Contingent Announcements"
+SENDER = "Kyle Haines"
+PREVIEW = "Buses leave from the Summit Center lot at 06:00 sharp. Bring water, a rain layer and your ID badge. " * 3
+
+
+def per_recipient(recipients):
+    for email, name in recipients:
+        NewMessageEmail(CHANNEL, SENDER, PREVIEW).build(email, name).as_bytes()
+
+
+def shared(recipients):
+    template = NewMessageEmail(CHANNEL, SENDER, PREVIEW)
+    for email, name in recipients:
+        template.build(email, name).as_bytes()
+
+
+def measure(fn, recipients, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(recipients)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    fn(recipients)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipients", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    recipients = [(f"parent{i}@example.org", f"Parent {i}") for i in range(args.recipients)]
+
+    print(f"{'mode':<14} {'ms total':>9} {'us/recipient':>13} {'peak KiB':>9}")
+    for label, fn in (("per recipient", per_recipient), ("shared", shared)):
+        elapsed, peak = measure(fn, recipients, args.repeat)
+        print(f"{label:<14} {elapsed * 1000:>9.1f} {elapsed / args.recipients * 1e6:>13.1f} {peak / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
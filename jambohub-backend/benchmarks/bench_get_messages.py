@@ -0,0 +1,62 @@
+# benchmarks/bench_get_messages.py
+"""
+Query count and latency of GET /api/channels/<id>/messages as a channel grows.
+
+Run from jambohub-backend/:
+    python -m benchmarks.bench_get_messages
+"""
+
+import time
+import logging
+
+from benchmarks.server import use_scratch_database
+
+use_scratch_database()
+
+from sqlalchemy import event
+
+from backend.app import app
+from backend.models import engine, read_engine, SessionLocal, Message, User
+
+logging.disable(logging.INFO)
+
+SIZES = [10, 100, 1000, 2000]
+AUTHORS = 20
+
+
+def main():
+    statements = []
+    # Handlers read through read_engine; count both so nothing is missed
+    for counted in (engine, read_engine):
+        event.listen(counted, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    client = app.test_client()
+    token = client.post("/api/auth/login", json={"email": "admin", "password": "The3Bears"}).get_json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    db = SessionLocal()
+    for i in range(AUTHORS):
+        db.add(User(id=f"bench-{i}", first_name="Bench", last_name=str(i), email=f"b{i}@x", role="adult_leader", password_hash="x"))
+    db.commit()
+
+    existing = db.query(Message).filter(Message.channel_id == "announcements").count()
+    print(f"{'messages':>10} {'queries':>8} {'ms':>8}")
+    for size in SIZES:
+        db.add_all([
+            Message(channel_id="announcements", user_id=f"bench-{i % AUTHORS}", content=f"message {i}")
+            for i in range(existing, size)
+        ])
+        db.commit()
+        existing = size
+
+        statements.clear()
+        start = time.perf_counter()
+        resp = client.get("/api/channels/announcements/messages", headers=headers)
+        elapsed = (time.perf_counter() - start) * 1000
+        assert resp.status_code == 200 and len(resp.get_json()) == size
+        print(f"{size:>10} {len(statements):>8} {elapsed:>8.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
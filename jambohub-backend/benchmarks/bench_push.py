@@ -0,0 +1,110 @@
+# benchmarks/bench_push.py
+"""
+Web push fan-out throughput against a local fake push service.
+
+The fake service answers every POST after --latency-ms, and answers 410 Gone
+for a share of endpoints so dead-subscription cleanup is exercised too.
+Each run re-creates the subscriptions and reports deliveries per second for
+a range of push pool sizes.
+
+Run from jambohub-backend/:
+    python -m benchmarks.bench_push --subscribers 300 --latency-ms 80
+"""
+
+import argparse
+import base64
+import os
+import threading
+import time
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.server import use_scratch_database
+
+use_scratch_database()
+
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives import serialization
+
+from backend import app as appmod
+from backend.models import SessionLocal, PushSubscription
+
+logging.disable(logging.ERROR)
+
+
+def make_handler(latency):
+    class FakePushService(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            status = 410 if self.path.startswith("/gone/") else 201
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    return FakePushService
+
+
+def b64(data):
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def create_subscriptions(port, count, gone_every):
+    db = SessionLocal()
+    db.query(PushSubscription).delete()
+    for i in range(count):
+        key = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+            serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+        )
+        kind = "gone" if gone_every and i % gone_every == 0 else "live"
+        db.add(PushSubscription(
+            user_id="admin1",
+            endpoint=f"http://127.0.0.1:{port}/{kind}/{i}",
+            p256dh_key=b64(key),
+            auth_key=b64(os.urandom(16)),
+        ))
+    db.commit()
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--gone-every", type=int, default=20, help="every Nth endpoint answers 410")
+    parser.add_argument("--pools", default="1,4,16,32")
+    args = parser.parse_args()
+
+    appmod.PUSH_ENABLED = True
+    appmod.VAPID_PRIVATE_KEY_FILE = os.path.abspath("vapid_private.pem")
+    appmod.init_vapid()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency_ms / 1000))
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"{'pool':>5} {'subs':>6} {'seconds':>8} {'deliveries/s':>13} {'removed':>8}")
+    for pool in [int(p) for p in args.pools.split(",")]:
+        create_subscriptions(port, args.subscribers, args.gone_every)
+        appmod.PUSH_MAX_WORKERS = pool
+        appmod._push_executor = None
+
+        start = time.perf_counter()
+        appmod.send_push_notification("Bench", "Bus leaves at 6:00")
+        elapsed = time.perf_counter() - start
+
+        db = SessionLocal()
+        remaining = db.query(PushSubscription).count()
+        db.close()
+        print(f"{pool:>5} {args.subscribers:>6} {elapsed:>8.2f} {args.subscribers / elapsed:>13.1f} {args.subscribers - remaining:>8}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_search.py
+"""
+/api/search latency on a large message corpus.
+
+Fills a throwaway database with --messages messages spread over the seeded
+channels (the FTS index is filled by its insert trigger, as in production),
+then times /api/search through the Flask test client for a mix of rare,
+common, multi-word and prefix queries, as the admin (every channel) and as
+a youth member (public channels only).
+
+Run from jambohub-backend/:
+    python -m benchmarks.bench_search --messages 100000
+"""
+
+import argparse
+import random
+import time
+import logging
+from datetime import datetime, timedelta
+
+from benchmarks.server import use_scratch_database
+
+use_scratch_database()
+
+from backend.app import app
+from backend.auth import create_token, hash_password
+from backend.models import SessionLocal, Channel, Message, User, engine
+
+logging.disable(logging.ERROR)
+
+WORDS = (
+    "bus leaves summit lot sharp bring water rain layer badge patrol merit badge session "
+    "dinner lunch breakfast campsite tent inspection swim check arena show shuttle gate "
+    "trading post flag ceremony chaplain service hike zipline climbing rifle archery "
+    "medic first aid sunscreen hat canteen lantern schedule change weather alert"
+).split()
+
+QUERIES = ["departure", "bus", "merit badge", "swim check arena", "zipl", "flag ceremony tomorrow", "water"]
+
+
+def fill(count):
+    db = SessionLocal()
+    channel_ids = [c.id for c in db.query(Channel)]
+    db.add(User(id="bench-youth", username="bench-youth", first_name="Bench", last_name="Youth",
+                email="youth@example.org", role="youth", password_hash=hash_password("x")))
+    db.commit()
+    db.close()
+
+    rng = random.Random(1)
+    start = datetime.utcnow() - timedelta(days=30)
+    rows = []
+    for i in range(count):
+        words = rng.choices(WORDS, k=rng.randint(6, 30))
+        if i % 5000 == 0:
+            words.append("departure")
+        rows.append({
+            "channel_id": rng.choice(channel_ids),
+            "user_id": "admin1",
+            "content": " ".join(words).capitalize() + ".",
+            "pinned": False,
+            "created_at": start + timedelta(seconds=i * 20),
+        })
+    with engine.begin() as conn:
+        conn.execute(Message.__table__.insert(), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    fill(args.messages)
+    print(f"indexed {args.messages} messages in {time.perf_counter() - start:.1f}s\n")
+
+    client = app.test_client()
+    tokens = {"admin": create_token("admin1", "admin"), "youth": create_token("bench-youth", "youth")}
+
+    print(f"{'as':<6} {'query':<24} {'hits':>5} {'p50 ms':>8} {'p95 ms':>8}")
+    for who, token in tokens.items():
+        headers = {"Authorization": f"Bearer {token}"}
+        for q in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                t = time.perf_counter()
+                response = client.get("/api/search", query_string={"q": q}, headers=headers)
+                timings.append(time.perf_counter() - t)
+            timings.sort()
+            hits = len(response.get_json())
+            p50 = timings[len(timings) // 2] * 1000
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000
+            print(f"{who:<6} {q:<24} {hits:>5} {p50:>8.1f} {p95:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_smtp.py
+"""
+Bulk email throughput: one SMTP connection per recipient vs a reused SMTPSession.
+
+Runs against a local SMTP sink (aiosmtpd if installed, else the stdlib smtpd
+module on Python <= 3.11). --handshake-ms adds a delay to every new connection
+to stand in for Gmail's TLS handshake + AUTH, which a local sink doesn't have.
+
+Run from jambohub-backend/:
+    python -m benchmarks.bench_smtp --recipients 200 --handshake-ms 300
+"""
+
+import argparse
+import smtplib
+import threading
+import time
+
+from backend.email_service import SMTPSession, build_email
+
+
+def start_sink(port):
+    try:
+        from aiosmtpd.controller import Controller
+
+        class Sink:
+            async def handle_DATA(self, server, session, envelope):
+                return "250 OK"
+
+        controller = Controller(Sink(), hostname="127.0.0.1", port=port)
+        controller.start()
+        return controller.stop
+    except ImportError:
+        import asyncore
+        import warnings
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            import smtpd
+
+        class Sink(smtpd.SMTPServer):
+            def process_message(self, *args, **kwargs):
+                return None
+
+        Sink(("127.0.0.1", port), None)
+        threading.Thread(target=asyncore.loop, kwargs={"timeout": 0.1}, daemon=True).start()
+        return lambda: None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipients", type=int, default=200)
+    parser.add_argument("--handshake-ms", type=float, default=300)
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+
+    stop = start_sink(args.port)
+    time.sleep(0.2)
+
+    connections = 0
+
+    def connect():
+        nonlocal connections
+        connections += 1
+        time.sleep(args.handshake_ms / 1000)
+        return smtplib.SMTP("127.0.0.1", args.port)
+
+    messages = [
+        build_email(f"parent{i}@example.org", "New message in Announcements - JamboHub", "<p>Bus leaves at 6:00</p>")
+        for i in range(args.recipients)
+    ]
+
+    print(f"{'mode':<24} {'sent':>6} {'conns':>6} {'seconds':>8} {'msg/s':>8}")
+
+    connections = 0
+    start = time.perf_counter()
+    sent = 0
+    for msg in messages:
+        with SMTPSession(connect=connect) as session:
+            sent += session.send(msg)
+    elapsed = time.perf_counter() - start
+    print(f"{'connection per message':<24} {sent:>6} {connections:>6} {elapsed:>8.2f} {sent / elapsed:>8.1f}")
+
+    connections = 0
+    start = time.perf_counter()
+    sent = 0
+    with SMTPSession(connect=connect) as session:
+        for msg in messages:
+            sent += session.send(msg)
+    elapsed = time.perf_counter() - start
+    print(f"{'reused SMTPSession':<24} {sent:>6} {connections:>6} {elapsed:>8.2f} {sent / elapsed:>8.1f}")
+
+    stop()
+
+
+if __name__ == "__main__":
+    main()
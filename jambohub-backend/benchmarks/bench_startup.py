@@ -0,0 +1,93 @@
+# benchmarks/bench_startup.py
+"""
+Time from starting gunicorn to the first passing /health check.
+
+This is what a Fly machine woken by auto_start_machines goes through
+before it can answer. A throwaway database with --messages messages is
+prepared once. gunicorn is then started against it --runs times and
+/health is polled every 10 ms until it answers.
+
+--mode ddl resets the schema version to 0 before each start, so the boot
+runs the full baseline (create_all, every CREATE ... IF NOT EXISTS, the
+seed check) the way every boot did before versioned migrations. It runs
+once in the master, where the old path ran it in every worker, so it
+understates the old cost slightly. --mode both (the default) times the
+two back to back on the same database.
+
+Run from jambohub-backend/:
+    python -m benchmarks.bench_startup --runs 10
+    python -m benchmarks.bench_startup --mode ddl
+"""
+
+import argparse
+import os
+import time
+import logging
+from datetime import datetime, timedelta
+
+from benchmarks.server import use_scratch_database, start_server, percentile
+
+use_scratch_database()
+
+from sqlalchemy import text
+
+from backend.models import init_db, Message, engine
+
+logging.disable(logging.ERROR)
+
+
+def prepare(count):
+    init_db()
+    start = datetime.utcnow() - timedelta(days=30)
+    with engine.begin() as conn:
+        conn.execute(Message.__table__.insert(), [{
+            "channel_id": "announcements",
+            "user_id": "admin1",
+            "content": f"Bus {i % 40} leaves the summit lot at {i % 24}:00 sharp",
+            "pinned": False,
+            "created_at": start + timedelta(seconds=i * 20),
+        } for i in range(count)])
+    engine.dispose()
+
+
+def reset_schema_version():
+    with engine.begin() as conn:
+        conn.execute(text("PRAGMA user_version = 0"))
+    engine.dispose()
+
+
+def time_starts(runs, workers, always_ddl):
+    timings = []
+    for _ in range(runs):
+        if always_ddl:
+            reset_schema_version()
+        start = time.perf_counter()
+        proc, _ = start_server(workers=workers, database=os.environ["DATABASE_PATH"], poll_seconds=0.01)
+        timings.append(time.perf_counter() - start)
+        proc.terminate()
+        proc.wait()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--mode", choices=("migrated", "ddl", "both"), default="both",
+                        help="migrated: schema already current; ddl: run the baseline DDL on every boot")
+    args = parser.parse_args()
+
+    prepare(args.messages)
+    modes = ("migrated", "ddl") if args.mode == "both" else (args.mode,)
+
+    print(f"runs={args.runs} messages={args.messages}")
+    print(f"{'mode':10} {'p50 ms':>8} {'min ms':>8} {'max ms':>8}  (start to healthy)")
+    for mode in modes:
+        timings = time_starts(args.runs, args.workers, always_ddl=mode == "ddl")
+        print(f"{mode:10} {percentile(timings, 50) * 1000:8.0f} "
+              f"{min(timings) * 1000:8.0f} {max(timings) * 1000:8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_write_contention.py
+"""
+Concurrent message writes from two processes, as from two gunicorn workers.
+
+Each of --processes processes runs --threads threads that post messages the
+way post_message does (channel version read, message insert, push job
+enqueue, commit) against one shared throwaway database for --seconds.
+Reports commits/s, latency and "database is locked" errors.
+
+--profile none drops the per-connection PRAGMA hook, leaving connections at
+SQLite's defaults as before (WAL only).
+
+Run from jambohub-backend/:
+    python -m benchmarks.bench_write_contention --profile none
+    python -m benchmarks.bench_write_contention
+"""
+
+import argparse
+import logging
+import multiprocessing
+import threading
+import time
+
+from benchmarks.server import use_scratch_database
+
+
+def writer(workdir, profile, threads, seconds, start_at, results):
+    use_scratch_database(workdir)
+    from sqlalchemy import event
+    from sqlalchemy.exc import OperationalError
+    from backend import jobs
+    from backend.models import SessionLocal, DataVersion, Message, engine, apply_sqlite_pragmas
+
+    logging.disable(logging.ERROR)
+    if profile == "none":
+        event.remove(engine, "connect", apply_sqlite_pragmas)
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def run():
+        while time.time() < start_at:
+            time.sleep(0.01)
+        deadline = start_at + seconds
+        while time.time() < deadline:
+            began = time.perf_counter()
+            db = SessionLocal()
+            try:
+                db.query(DataVersion.version).filter(DataVersion.key == "channels").first()
+                db.add(Message(channel_id="announcements", user_id="admin1", content="Check-in: all present"))
+                jobs.enqueue(db, "push", {"title": "#announcements", "body": "Check-in", "url": "/"})
+                db.commit()
+                ok = True
+            except OperationalError as e:
+                db.rollback()
+                ok = False
+                with lock:
+                    errors.append(str(e.orig))
+            finally:
+                db.close()
+            if ok:
+                with lock:
+                    latencies.append(time.perf_counter() - began)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    results.put((latencies, errors))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", choices=["default", "none"], default="default")
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    workdir = use_scratch_database()
+    from backend.models import init_db
+    init_db()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    start_at = time.time() + 3  # after every process has imported the app
+    procs = [
+        ctx.Process(target=writer, args=(workdir, args.profile, args.threads, args.seconds, start_at, results))
+        for _ in range(args.processes)
+    ]
+    for p in procs:
+        p.start()
+    latencies, errors = [], []
+    for _ in procs:
+        proc_latencies, proc_errors = results.get()
+        latencies += proc_latencies
+        errors += proc_errors
+    for p in procs:
+        p.join()
+
+    latencies.sort()
+    attempts = len(latencies) + len(errors)
+    print(f"profile={args.profile} processes={args.processes} threads={args.threads} seconds={args.seconds:g}")
+    print(f"commits={len(latencies)} ({len(latencies) / args.seconds:.1f}/s)  "
+          f"errors={len(errors)} ({100 * len(errors) / max(attempts, 1):.1f}%)")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"commit ms p50={p50 * 1000:.1f} p99={p99 * 1000:.1f} max={latencies[-1] * 1000:.1f}")
+    for message in sorted(set(errors)):
+        print(f"  {errors.count(message)} x {message}")
+
+
+if __name__ == "__main__":
+    main()
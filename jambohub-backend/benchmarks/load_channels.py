@@ -0,0 +1,118 @@
+# benchmarks/load_channels.py
+"""
+/api/channels latency under many concurrent clients, per serving mode.
+
+For each mode in --modes (worker_class:workers:threads) gunicorn is started
+with gunicorn.conf.py against a throwaway database. --streams message
+streams (SSE) are opened first, as phones with the app open would hold,
+then --clients threads fetch /api/channels in a loop for --seconds.
+Requests that fail or exceed --timeout count as errors.
+
+The default --streams is above the total thread count of the default
+mode. Each stream holds a thread, so without the per-worker stream cap
+the API would starve. Streams the server turns away (503, the client
+polls instead) are reported as refused.
+
+"sync:2:1" is the old Dockerfile (two sync workers); "gthread:2:50" is the
+default in gunicorn.conf.py.
+
+Run from jambohub-backend/:
+    python -m benchmarks.load_channels --clients 200 --streams 200 --modes sync:2:1,gthread:2:50
+"""
+
+import argparse
+import threading
+import time
+
+import requests
+
+from backend.auth import create_token, create_stream_token
+from benchmarks.server import start_server, percentile
+
+
+def open_streams(url, count, stop, statuses):
+    def hold():
+        try:
+            with requests.get(f"{url}/api/channels/announcements/stream",
+                              params={"token": create_stream_token("admin1", "announcements")},
+                              stream=True, timeout=(5, None)) as response:
+                statuses.append(response.status_code)
+                for _ in response.iter_lines():
+                    if stop.is_set():
+                        return
+        except requests.RequestException:
+            pass
+
+    threads = [threading.Thread(target=hold, daemon=True) for _ in range(count)]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def run_mode(mode, args):
+    worker_class, workers, threads = mode.split(":")
+    proc, url = start_server(workers, threads, worker_class)
+    token = create_token("admin1", "admin")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    stop = threading.Event()
+    statuses = []
+    open_streams(url, args.streams, stop, statuses)
+    time.sleep(1)
+
+    deadline = time.monotonic() + args.seconds
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def client():
+        nonlocal errors
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = session.get(url + "/api/channels", headers=headers, timeout=args.timeout).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    clients = [threading.Thread(target=client) for _ in range(args.clients)]
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+
+    stop.set()
+    proc.terminate()
+    proc.wait()
+
+    streams = f"{statuses.count(200)}/{statuses.count(503)}"
+    if latencies:
+        print(f"{mode:<14} {len(latencies) / args.seconds:>7.1f} {percentile(latencies, 50) * 1000:>8.1f} "
+              f"{percentile(latencies, 99) * 1000:>8.1f} {errors:>7} {streams:>10}")
+    else:
+        print(f"{mode:<14} {0:>7.1f} {'-':>8} {'-':>8} {errors:>7} {streams:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--modes", default="sync:2:1,gthread:2:50")
+    args = parser.parse_args()
+
+    print(f"clients={args.clients} streams={args.streams} seconds={args.seconds:g}")
+    print(f"{'mode':<14} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'open/503':>10}")
+    for mode in args.modes.split(","):
+        run_mode(mode, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/load_login.py
+"""
+Login throughput and /health latency while logins hammer the server.
+
+Starts gunicorn with gunicorn.conf.py (override with --workers /
+--threads) against a throwaway database, or targets a running server with
+--url. --clients threads post the admin login in a loop while one more
+thread polls /health; the report shows logins/s, how many were shed with
+503 (clients honour Retry-After), and /health latency percentiles.
+
+BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS and PASSWORD_HASH_QUEUE_LIMIT are
+passed through from the environment, e.g.:
+
+Run from jambohub-backend/:
+    PASSWORD_HASH_WORKERS=2 python -m benchmarks.load_login --clients 40 --seconds 15
+"""
+
+import argparse
+import threading
+import time
+
+import requests
+
+from benchmarks.server import start_server, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="target a running server instead of starting gunicorn")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--clients", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="The3Bears")
+    args = parser.parse_args()
+
+    proc = None
+    url = args.url
+    if not url:
+        proc, url = start_server(args.workers, args.threads)
+
+    # One login first so the seeded hash is upgraded before timing starts
+    requests.post(url + "/api/auth/login", json={"email": args.username, "password": args.password})
+
+    deadline = time.monotonic() + args.seconds
+    counts = {"ok": 0, "busy": 0, "error": 0}
+    login_latency = []
+    health_latency = []
+    lock = threading.Lock()
+
+    def login_client():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            retry_after = 0
+            try:
+                response = session.post(url + "/api/auth/login", timeout=60,
+                                        json={"email": args.username, "password": args.password})
+                status = response.status_code
+                retry_after = float(response.headers.get("Retry-After", 0))
+            except requests.RequestException:
+                status = None
+            elapsed = time.perf_counter() - start
+            key = "ok" if status == 200 else "busy" if status == 503 else "error"
+            with lock:
+                counts[key] += 1
+                if key == "ok":
+                    login_latency.append(elapsed)
+            if key == "busy":
+                # Don't sit on an idle keep-alive connection gunicorn is about to drop
+                session.close()
+                time.sleep(retry_after)
+
+    def health_client():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            session.get(url + "/health", timeout=60)
+            health_latency.append(time.perf_counter() - start)
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=login_client) for _ in range(args.clients)]
+    threads.append(threading.Thread(target=health_client))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    if proc:
+        proc.terminate()
+        proc.wait()
+
+    print(f"clients={args.clients} seconds={args.seconds:g}")
+    print(f"logins ok={counts['ok']} ({counts['ok'] / args.seconds:.1f}/s)  shed 503={counts['busy']}  errors={counts['error']}")
+    if login_latency:
+        print(f"login ms   p50={percentile(login_latency, 50) * 1000:.0f} p95={percentile(login_latency, 95) * 1000:.0f}")
+    print(f"/health ms p50={percentile(health_latency, 50) * 1000:.1f} p95={percentile(health_latency, 95) * 1000:.1f} "
+          f"p99={percentile(health_latency, 99) * 1000:.1f} max={max(health_latency) * 1000:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/load_mixed.py
+"""
+Read latency with and without concurrent writers.
+
+Starts gunicorn against a throwaway database and seeds --messages messages.
+Readers then fetch the full message list of a channel and the admin user
+list (the long reads) for --seconds, first alone and then while --writers
+threads post messages as fast as they can. With WAL and separate read and
+write pools, reader latency should barely change between the two phases.
+
+Run from jambohub-backend/:
+    python -m benchmarks.load_mixed --readers 40 --writers 20
+"""
+
+import argparse
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from backend.auth import create_token
+from benchmarks.server import start_server, percentile
+
+READ_PATHS = ("/api/channels/announcements/messages", "/api/admin/users")
+
+
+def seed(url, headers, count):
+    def post(i):
+        with requests.Session() as session:
+            session.post(f"{url}/api/channels/activities/messages", headers=headers,
+                         json={"content": f"Schedule update {i}: merit badge session moved to the arena"})
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(post, range(count)))
+
+
+def run_phase(url, headers, readers, writers, seconds, timeout):
+    deadline = time.monotonic() + seconds
+    reads, writes = [], []
+    errors = {"read": 0, "write": 0}
+    lock = threading.Lock()
+
+    def loop(kind, request):
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = request(session).ok
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    (reads if kind == "read" else writes).append(elapsed)
+                else:
+                    errors[kind] += 1
+
+    def reader(n):
+        paths = itertools.cycle(READ_PATHS[n % 2:] + READ_PATHS[:n % 2])
+        loop("read", lambda s: s.get(url + next(paths), headers=headers, timeout=timeout))
+
+    def writer(n):
+        loop("write", lambda s: s.post(f"{url}/api/channels/activities/messages", headers=headers,
+                                       json={"content": f"Check-in from patrol {n}"}, timeout=timeout))
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return reads, writes, errors
+
+
+def report(label, samples, errors, seconds):
+    if not samples:
+        print(f"{label:<22} {'-':>7} {'-':>8} {'-':>8} {errors:>7}")
+        return
+    print(f"{label:<22} {len(samples) / seconds:>7.1f} {percentile(samples, 50) * 1000:>8.1f} "
+          f"{percentile(samples, 99) * 1000:>8.1f} {errors:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=40)
+    parser.add_argument("--writers", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    proc, url = start_server()
+    try:
+        headers = {"Authorization": f"Bearer {create_token('admin1', 'admin')}"}
+        seed(url, headers, args.messages)
+
+        print(f"readers={args.readers} writers={args.writers} messages={args.messages} seconds={args.seconds:g}")
+        print(f"{'phase':<22} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        reads, _, errors = run_phase(url, headers, args.readers, 0, args.seconds, args.timeout)
+        report("reads alone", reads, errors["read"], args.seconds)
+        reads, writes, errors = run_phase(url, headers, args.readers, args.writers, args.seconds, args.timeout)
+        report("reads with writers", reads, errors["read"], args.seconds)
+        report("writes", writes, errors["write"], args.seconds)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/load_posts.py
+"""
+Sustained message-post throughput, with and without group commit.
+
+For each setting in --modes, gunicorn is started against a throwaway
+database and --clients clients post messages as fast as they can for
+--seconds (the 21:00 check-in flurry). Reports posts/s, latency and, for
+batched runs, the average batch size seen by one worker.
+
+A mode is WRITE_BATCHING[/SQLITE_SYNCHRONOUS]; e.g. 0/FULL posts without
+batching with a sync on every commit, which is closest to a slow volume.
+
+Run from jambohub-backend/:
+    python -m benchmarks.load_posts --modes 0,1,0/FULL,1/FULL
+"""
+
+import argparse
+import threading
+import time
+
+import requests
+
+from backend.auth import create_token
+from benchmarks.server import start_server, percentile
+
+
+def run_mode(mode, args):
+    batching, _, synchronous = mode.partition("/")
+    env = {"WRITE_BATCHING": batching}
+    if synchronous:
+        env["SQLITE_SYNCHRONOUS"] = synchronous
+    proc, url = start_server(env=env)
+    headers = {"Authorization": f"Bearer {create_token('admin1', 'admin')}"}
+
+    deadline = time.monotonic() + args.seconds
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def client(n):
+        nonlocal errors
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = session.post(f"{url}/api/channels/activities/messages", headers=headers,
+                                  json={"content": f"Patrol {n} checked in, all present"},
+                                  timeout=args.timeout).status_code == 201
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    try:
+        clients = [threading.Thread(target=client, args=(n,)) for n in range(args.clients)]
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join()
+        stats = requests.get(f"{url}/api/admin/write-batches", headers=headers).json()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    batch = stats["averageBatch"] if stats["enabled"] else "-"
+    if latencies:
+        print(f"{mode:<8} {len(latencies) / args.seconds:>7.1f} {percentile(latencies, 50) * 1000:>8.1f} "
+              f"{percentile(latencies, 99) * 1000:>8.1f} {errors:>7} {batch:>7}")
+    else:
+        print(f"{mode:<8} {0:>7.1f} {'-':>8} {'-':>8} {errors:>7} {batch:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--modes", default="0,1")
+    args = parser.parse_args()
+
+    print(f"clients={args.clients} seconds={args.seconds:g}")
+    print(f"{'mode':<8} {'posts/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'batch':>7}")
+    for mode in args.modes.split(","):
+        run_mode(mode, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/server.py
+"""
+Shared helpers for the benchmarks: point this process at a throwaway
+database, start gunicorn with the deployed gunicorn.conf.py against one,
+and percentiles.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def use_scratch_database(workdir=None):
+    """
+    Work in workdir (a new temp dir if None) with DATABASE_PATH pointing
+    there, so nothing touches /data. Call before importing anything from
+    backend: models reads DATABASE_PATH at import. Returns workdir.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="jambohub-bench-")
+    os.chdir(workdir)
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "jambohub.db")
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    return workdir
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers=None, threads=None, worker_class=None, env=None, database=None, poll_seconds=0.2):
+    """
+    Start gunicorn in a temp dir and wait for /health. Settings left as None
+    keep gunicorn.conf.py's defaults; env adds app settings. database serves
+    an existing file instead of a new one. Returns (process, base url).
+    """
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, **(env or {}))
+    for name, value in (("WEB_CONCURRENCY", workers), ("GUNICORN_THREADS", threads),
+                        ("GUNICORN_WORKER_CLASS", worker_class)):
+        if value is not None:
+            env[name] = str(value)
+    if database:
+        workdir = os.path.dirname(os.path.abspath(database))
+        env["DATABASE_PATH"] = os.path.abspath(database)
+    else:
+        workdir = tempfile.mkdtemp(prefix="jambohub-bench-")
+        env["DATABASE_PATH"] = os.path.join(workdir, "jambohub.db")
+        # Create and seed the database once so the workers don't race to do it
+        subprocess.run([sys.executable, "-c", "from backend.models import init_db; init_db()"],
+                       cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(BACKEND_DIR, "gunicorn.conf.py"),
+         "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "backend.app:app"],
+        cwd=workdir, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url + "/health", timeout=2)
+            return proc, url
+        except requests.RequestException:
+            time.sleep(poll_seconds)
+    proc.kill()
+    raise SystemExit("server did not start")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
@@ -0,0 +1,31 @@
+# gunicorn.conf.py - loaded automatically by gunicorn from the working directory
+#
+# Threaded workers by default: message streams (SSE) stay open for minutes
+# and SMTP/push/bcrypt/image work waits on pools, so each worker needs to
+# hold many requests at once. With the sync worker, two workers meant two
+# requests in flight for the whole app.
+#
+# Every setting can be overridden from the environment (fly secrets/env):
+#   WEB_CONCURRENCY        worker processes (default 2)
+#   GUNICORN_THREADS       threads per worker (default 50)
+#   STREAMS_PER_WORKER     message streams a worker serves at once (default
+#                          threads - 16); the rest of the pool stays free for
+#                          API calls, and streams over the cap poll instead
+#   GUNICORN_WORKER_CLASS  gthread (default); sync for the old behaviour
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8080")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "50"))
+timeout = 120
+keepalive = 5
+
+
+def on_starting(server):
+    """Migrate once in the master, before any worker imports the app"""
+    from backend.migrations import migrate
+    from backend.models import engine
+    migrate()
+    # Workers are forked from here; they must not inherit open SQLite connections
+    engine.dispose()
@@ -0,0 +1,42 @@
+# tests/conftest.py
+"""
+Every test session gets its own throwaway database. The engines are built
+when backend.models is imported, so DATABASE_PATH has to be set before any
+test module imports the backend.
+"""
+
+import os
+import shutil
+import tempfile
+
+DATABASE_DIR = tempfile.mkdtemp(prefix="jambohub-tests-")
+os.environ["DATABASE_PATH"] = os.path.join(DATABASE_DIR, "jambohub.db")
+# The seeded admin password is hashed at migration time; keep that quick
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DATABASE_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Path of the session database, migrated to the latest version"""
+    from backend.migrations import migrate
+    from backend.models import db_path
+    migrate()
+    return db_path
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    from backend.app import app
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers(database):
+    from backend.auth import create_token
+    return {"Authorization": f"Bearer {create_token('admin1', 'admin')}"}
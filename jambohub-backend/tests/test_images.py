@@ -0,0 +1,126 @@
+# tests/test_images.py
+"""
+Upload renditions: metadata is dropped and only real animations are kept.
+
+Run from jambohub-backend/:
+    python -m pytest tests
+"""
+
+import os
+
+import pytest
+
+from backend import images
+
+Image = pytest.importorskip("PIL.Image")
+from PIL import ExifTags  # noqa: E402
+
+
+def exif_with_gps():
+    exif = Image.Exif()
+    exif[ExifTags.Base.Make] = "PhoneCam"
+    gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+    gps[ExifTags.GPS.GPSLatitudeRef] = "N"
+    gps[ExifTags.GPS.GPSLatitude] = (37.0, 50.0, 12.0)
+    return exif
+
+
+def test_mpo_photo_is_rendered_as_stripped_webp(tmp_path):
+    src = tmp_path / "photo.jpg"
+    primary = Image.new("RGB", (4000, 3000), "navy")
+    depth = Image.new("RGB", (4000, 3000), "gray")
+    primary.save(src, "MPO", save_all=True, append_images=[depth], exif=exif_with_gps())
+    with Image.open(src) as img:
+        assert img.format == "MPO" and img.is_animated
+
+    display, thumb, width, height = images._render(str(src), str(tmp_path), "upload")
+
+    assert display == "upload.webp"
+    assert max(width, height) <= images.DISPLAY_MAX_SIDE
+    for name in (display, thumb):
+        with Image.open(tmp_path / name) as out:
+            assert out.format == "WEBP"
+            assert not getattr(out, "is_animated", False)
+            assert not out.getexif()
+            assert "exif" not in out.info
+    assert not src.exists()
+
+
+def test_animated_webp_is_reencoded_without_metadata(tmp_path):
+    src = tmp_path / "clip.webp"
+    frames = [Image.new("RGB", (2400, 1800), color) for color in ("red", "green", "blue")]
+    frames[0].save(src, "WEBP", save_all=True, append_images=frames[1:], duration=120, loop=0,
+                   exif=exif_with_gps())
+
+    display, thumb, width, height = images._render(str(src), str(tmp_path), "upload")
+
+    assert display == "upload.webp"
+    assert max(width, height) <= images.DISPLAY_MAX_SIDE
+    with Image.open(tmp_path / display) as out:
+        assert out.is_animated and out.n_frames == 3
+        assert "exif" not in out.info
+    assert os.path.exists(tmp_path / thumb)
+
+
+def test_animated_gif_is_kept_as_sent(tmp_path):
+    src = tmp_path / "wave.gif"
+    frames = [Image.new("RGB", (64, 64), color) for color in ("red", "green", "blue")]
+    frames[0].save(src, "GIF", save_all=True, append_images=frames[1:], duration=100, loop=0)
+    original = src.read_bytes()
+
+    display, thumb, _, _ = images._render(str(src), str(tmp_path), "upload")
+
+    assert display == "upload.gif"
+    assert (tmp_path / display).read_bytes() == original
+    assert os.path.exists(tmp_path / thumb)
+
+
+def test_exif_orientation_is_applied_after_shrinking(tmp_path):
+    src = tmp_path / "portrait.jpg"
+    exif = exif_with_gps()
+    exif[ExifTags.Base.Orientation] = 6  # stored landscape, shown rotated 90 degrees
+    Image.new("RGB", (3200, 2400), "olive").save(src, "JPEG", exif=exif)
+
+    display, thumb, width, height = images._render(str(src), str(tmp_path), "upload")
+
+    assert height > width and max(width, height) <= images.DISPLAY_MAX_SIDE
+    with Image.open(tmp_path / display) as out:
+        assert out.size == (width, height)
+        assert not out.getexif()
+
+
+@pytest.mark.filterwarnings("ignore::PIL.Image.DecompressionBombWarning")
+def test_image_over_the_pixel_limit_is_refused_before_decoding(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "MAX_PIXELS", 1_000_000)
+    src = tmp_path / "huge.png"
+    Image.new("RGB", (1200, 1000), "white").save(src, "PNG")
+
+    with pytest.raises(Image.DecompressionBombError):
+        images._render(str(src), str(tmp_path), "upload")
+    assert src.exists()
+
+
+def crash(*args):
+    os._exit(1)
+
+
+def test_dead_pool_process_is_replaced(tmp_path):
+    src = tmp_path / "photo.png"
+    Image.new("RGB", (800, 600), "teal").save(src, "PNG")
+    pool = images._get_pool()
+    pool.submit(os.getpid).result()
+    for process in list(pool._processes.values()):
+        process.kill()
+        process.join()
+
+    display, _, _, _ = images.process_upload(str(src), str(tmp_path), "upload")
+
+    assert (tmp_path / display).exists()
+    assert images._get_pool() is not pool
+
+
+def test_render_that_keeps_crashing_reports_unavailable(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "_render", crash)
+
+    with pytest.raises(images.ImageWorkerUnavailable):
+        images.process_upload(str(tmp_path / "any.png"), str(tmp_path), "upload")
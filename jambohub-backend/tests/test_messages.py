@@ -0,0 +1,72 @@
+# tests/test_messages.py
+"""
+Message paging: before_id and since_id walk (created_at, id), so messages
+sharing a timestamp are neither skipped nor repeated across pages.
+
+Run from jambohub-backend/:
+    python -m pytest tests
+"""
+
+from datetime import datetime
+
+import pytest
+
+from backend.models import SessionLocal, Channel, Message
+
+CHANNEL = "test-paging"
+
+
+@pytest.fixture(scope="module")
+def channel_ids(database):
+    """Ids of the channel's messages in display order"""
+    tie = datetime(2026, 7, 22, 12, 0, 0)
+    db = SessionLocal()
+    try:
+        db.add(Channel(id=CHANNEL, name="Paging"))
+        # Inserted newest first, so id order disagrees with time order
+        # everywhere except inside the tie
+        rows = [Message(channel_id=CHANNEL, user_id="admin1", content="late",
+                        created_at=datetime(2026, 7, 22, 13, 0, 0))]
+        rows += [Message(channel_id=CHANNEL, user_id="admin1", content=f"tie {i}", created_at=tie)
+                 for i in range(5)]
+        rows.append(Message(channel_id=CHANNEL, user_id="admin1", content="early",
+                            created_at=datetime(2026, 7, 22, 11, 0, 0)))
+        db.add_all(rows)
+        db.commit()
+        ordered = sorted(rows, key=lambda m: (m.created_at, m.id))
+        return [m.id for m in ordered]
+    finally:
+        db.close()
+
+
+def fetch(client, headers, **params):
+    response = client.get(f"/api/channels/{CHANNEL}/messages", query_string=params, headers=headers)
+    assert response.status_code == 200
+    return [m["id"] for m in response.get_json()]
+
+
+def test_full_list_is_in_created_at_then_id_order(client, admin_headers, channel_ids):
+    assert fetch(client, admin_headers) == channel_ids
+
+
+def test_paging_back_crosses_ties_without_gaps(client, admin_headers, channel_ids):
+    pages = [fetch(client, admin_headers, limit=2)]
+    while True:
+        page = fetch(client, admin_headers, limit=2, before_id=pages[0][0])
+        if not page:
+            break
+        pages.insert(0, page)
+
+    assert [i for page in pages for i in page] == channel_ids
+    assert all(len(page) <= 2 for page in pages)
+
+
+def test_polling_forward_crosses_ties_without_gaps(client, admin_headers, channel_ids):
+    seen = fetch(client, admin_headers, limit=2, since_id=channel_ids[0])
+    while True:
+        page = fetch(client, admin_headers, limit=2, since_id=seen[-1])
+        if not page:
+            break
+        seen += page
+
+    assert seen == channel_ids[1:]
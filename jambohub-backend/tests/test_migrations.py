@@ -0,0 +1,67 @@
+# tests/test_migrations.py
+"""
+Schema migrations: a new database runs every step, and a database shipped
+at the baseline (version 1) picks up only the steps after it.
+
+Run from jambohub-backend/:
+    python -m pytest tests
+"""
+
+import sqlite3
+
+from sqlalchemy import create_engine
+
+from backend import migrations
+
+
+def index_columns(path, name):
+    with sqlite3.connect(path) as conn:
+        return [row[2] for row in conn.execute(f"PRAGMA index_info({name})")]
+
+
+def user_version(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def baseline_copy(database, path):
+    """A copy of the test database as version 1 shipped it"""
+    with sqlite3.connect(database) as src, sqlite3.connect(path) as dst:
+        src.backup(dst)
+        dst.execute("DROP INDEX idx_messages_channel_created")
+        dst.execute("CREATE INDEX idx_messages_channel_created ON messages(channel_id, created_at DESC)")
+        dst.execute("PRAGMA user_version = 1")
+
+
+def use_database(monkeypatch, path):
+    monkeypatch.setattr(migrations, "engine", create_engine(f"sqlite:///{path}"))
+    monkeypatch.setattr(migrations, "db_path", str(path))
+
+
+def test_new_database_is_at_the_latest_version(database):
+    assert user_version(database) == migrations.LATEST_VERSION
+    assert index_columns(database, "idx_messages_channel_created") == ["channel_id", "created_at", "id"]
+    assert migrations.migrate() == []
+
+
+def test_baseline_database_runs_only_later_steps(database, tmp_path, monkeypatch):
+    path = tmp_path / "baseline.db"
+    baseline_copy(database, path)
+    use_database(monkeypatch, path)
+
+    assert migrations.migrate() == [2]
+    assert user_version(path) == migrations.LATEST_VERSION
+    assert index_columns(path, "idx_messages_channel_created") == ["channel_id", "created_at", "id"]
+    assert migrations.migrate() == []
+
+
+def test_message_order_step_tolerates_its_index_being_present(database, tmp_path, monkeypatch):
+    # A crash after the step commits but before user_version is bumped
+    path = tmp_path / "baseline.db"
+    with sqlite3.connect(database) as src, sqlite3.connect(path) as dst:
+        src.backup(dst)
+        dst.execute("PRAGMA user_version = 1")
+    use_database(monkeypatch, path)
+
+    assert migrations.migrate() == [2]
+    assert index_columns(path, "idx_messages_channel_created") == ["channel_id", "created_at", "id"]
@@ -0,0 +1,80 @@
+# tests/test_user_import.py
+"""
+Roster import: every row is validated on its own and reported in results,
+so one bad row (including wrongly typed JSON) doesn't fail the import.
+
+Run from jambohub-backend/:
+    python -m pytest tests
+"""
+
+from backend.models import ReadSessionLocal, User
+
+
+def scout(**fields):
+    row = {"firstName": "Pat", "lastName": "Rol", "email": "pat@example.org", "role": "youth"}
+    row.update(fields)
+    return row
+
+
+def import_rows(client, headers, rows):
+    response = client.post("/api/admin/users/import", json=rows, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_wrongly_typed_fields_are_reported_per_row(client, admin_headers):
+    report = import_rows(client, admin_headers, [
+        scout(email=5),
+        scout(password=123),
+        scout(role=["youth"]),
+        scout(firstName={"first": "Pat"}, lastName=None),
+        scout(age=True),
+        "not a row",
+        scout(username="typed-ok", age=14),
+    ])
+
+    errors = [r.get("error") for r in report["results"]]
+    assert errors == [
+        "Expected text for email",
+        "Expected text for password",
+        "Expected text for role",
+        "Expected text for firstName",
+        "Expected text for age",
+        "Row is not an object",
+        None,
+    ]
+    assert report["created"] == 1 and report["failed"] == 6
+
+
+def test_invalid_values_are_reported_per_row(client, admin_headers):
+    report = import_rows(client, admin_headers, [
+        scout(firstName="  "),
+        scout(role="ranger"),
+        scout(age="twelve"),
+        scout(username="twin-a"),
+        scout(username="twin-a"),
+        scout(username="admin"),
+    ])
+
+    assert [(r["status"], r.get("error")) for r in report["results"]] == [
+        ("error", "First name, last name, email, and role are required"),
+        ("error", "Unknown role 'ranger'"),
+        ("error", "Age must be a number, got 'twelve'"),
+        ("created", None),
+        ("error", "Username 'twin-a' appears more than once in the import"),
+        ("error", "Username 'admin' already taken"),
+    ]
+
+
+def test_created_rows_are_stored_normalised(client, admin_headers):
+    report = import_rows(client, admin_headers, [
+        scout(username="norm-check", email="  Pat.Rol@Example.ORG ", age="13", patrol=""),
+    ])
+
+    db = ReadSessionLocal()
+    try:
+        user = db.query(User).filter(User.id == report["results"][0]["id"]).one()
+    finally:
+        db.close()
+    assert (user.email, user.age, user.patrol) == ("pat.rol@example.org", 13, None)
+    assert user.password_hash.startswith("$2")
@@ -0,0 +1,107 @@
+# tests/test_write_batch.py
+"""
+Group commit: a failing write fails only its own caller, and a caller that
+times out gets WriteTimeout only for a write that will never run.
+
+Run from jambohub-backend/:
+    python -m pytest tests
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend import app as app_module
+from backend.models import ReadSessionLocal, DataVersion
+from backend.write_batch import WriteBatcher, WriteTimeout
+
+
+def mark(key):
+    """A write that leaves a row behind, so tests can see whether it committed"""
+    def write(db):
+        db.add(DataVersion(key=f"test:{key}", version=1))
+        db.flush()
+        return key
+    return write
+
+
+def committed(key):
+    db = ReadSessionLocal()
+    try:
+        return db.query(DataVersion).filter(DataVersion.key == f"test:{key}").first() is not None
+    finally:
+        db.close()
+
+
+def fail(db):
+    raise ValueError("bad write")
+
+
+def test_failed_write_raises_in_its_caller(database):
+    batcher = WriteBatcher(window_ms=1)
+
+    with pytest.raises(ValueError, match="bad write"):
+        batcher.submit(fail)
+    assert batcher.submit(mark("after-failure")) == "after-failure"
+    assert committed("after-failure")
+
+
+def test_bad_write_does_not_fail_its_batch(database):
+    # A long window so all three land in the same batch
+    batcher = WriteBatcher(window_ms=300)
+    writes = [mark("neighbour-1"), fail, mark("neighbour-2")]
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(batcher.submit, write) for write in writes]
+        outcomes = [f.exception() or f.result() for f in futures]
+
+    assert outcomes[0] == "neighbour-1" and outcomes[2] == "neighbour-2"
+    assert isinstance(outcomes[1], ValueError)
+    assert committed("neighbour-1") and committed("neighbour-2")
+    assert batcher.stats()["splitBatches"] == 1
+
+
+def test_write_still_queued_at_timeout_is_dropped(database):
+    batcher = WriteBatcher(window_ms=1, timeout=0.2)
+    release = threading.Event()
+
+    def blocker(db):
+        release.wait()
+        return "blocker"
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        first = pool.submit(batcher.submit, blocker)
+        time.sleep(0.05)  # let the writer take it
+        with pytest.raises(WriteTimeout):
+            batcher.submit(mark("timed-out"))
+        release.set()
+        assert first.result() == "blocker"
+
+    # The writer moves on past the cancelled write without running it
+    assert batcher.submit(mark("after-timeout")) == "after-timeout"
+    assert not committed("timed-out")
+
+
+def test_write_already_running_at_timeout_returns_its_result(database):
+    batcher = WriteBatcher(window_ms=1, timeout=0.1)
+
+    def slow(db):
+        time.sleep(0.3)
+        return mark("slow")(db)
+
+    assert batcher.submit(slow) == "slow"
+    assert committed("slow")
+
+
+def test_write_timeout_is_a_retryable_503(client, admin_headers, monkeypatch):
+    def busy(fn):
+        raise WriteTimeout()
+    monkeypatch.setattr(app_module.write_batcher, "submit", busy)
+
+    response = client.post("/api/channels/announcements/messages", json={"content": "Buses at 6"},
+                           headers=admin_headers)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
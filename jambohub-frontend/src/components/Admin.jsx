@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { 
   Shield, UserPlus, Search, Edit2, Trash2, 
   KeyRound, X, Users, Loader2, Upload, Download,
@@ -7,9 +7,20 @@ import {
 } from 'lucide-react';
 import * as api from '../lib/api';
 
+const USER_PAGE_SIZE = 100;
+// Everything the roster, user cards and edit form read
+const USER_FIELDS = [
+  'id', 'username', 'firstName', 'lastName', 'email', 'phone', 'age', 'gender', 'role',
+  'position', 'unit', 'patrol', 'emergencyContactName', 'emergencyContactPhone'
+];
+const EXPORT_FIELDS = USER_FIELDS.filter(f => f !== 'id');
+
 export default function Admin({ currentUser }) {
   const [activeTab, setActiveTab] = useState('roster');
   const [users, setUsers] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [memberUnits, setMemberUnits] = useState([]);
   const [units, setUnits] = useState([]);
   const [channels, setChannels] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -25,6 +36,8 @@ export default function Admin({ currentUser }) {
   const [success, setSuccess] = useState('');
   const [copied, setCopied] = useState(false);
   const [expandedUser, setExpandedUser] = useState(null);
+  const usersRequestRef = useRef(0);
+  const filtersChangedRef = useRef(false);
 
   const emptyForm = {
     username: '', firstName: '', lastName: '', email: '', phone: '',
@@ -54,14 +67,54 @@ export default function Admin({ currentUser }) {
 
   useEffect(() => { fetchData(); }, []);
 
+  // Search and filters run on the server; wait for typing to settle
+  useEffect(() => {
+    if (!filtersChangedRef.current) {
+      filtersChangedRef.current = true;
+      return;
+    }
+    const timer = setTimeout(() => {
+      fetchUsers().catch(() => setError('Failed to load users'));
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [searchQuery, roleFilter, unitFilter]);
+
+  const userFilters = () => ({
+    q: searchQuery.trim(),
+    role: roleFilter === 'all' ? null : roleFilter,
+    unit: unitFilter === 'all' ? null : unitFilter
+  });
+
+  // One page of matching users; with a cursor, appends the next page
+  const fetchUsers = async (cursor = null) => {
+    const request = ++usersRequestRef.current;
+    const page = await api.getAllUsers({ ...userFilters(), fields: USER_FIELDS, limit: USER_PAGE_SIZE, cursor });
+    if (request !== usersRequestRef.current) return;
+    setUsers(prev => cursor ? [...prev, ...page.users] : page.users);
+    setNextCursor(page.nextCursor);
+  };
+
+  const loadMoreUsers = async () => {
+    setLoadingMore(true);
+    try {
+      await fetchUsers(nextCursor);
+    } catch (err) {
+      setError('Failed to load users');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchData = async () => {
     try {
-      const [usersData, unitsData, channelsData] = await Promise.all([
-        api.getAllUsers(),
+      // Only each user's unit for the totals; the roster itself is paged
+      const [, membersData, unitsData, channelsData] = await Promise.all([
+        fetchUsers(),
+        api.getAllUsers({ fields: ['unit'] }),
         api.getUnits().catch(() => []),
         api.getChannels().catch(() => [])
       ]);
-      setUsers(usersData);
+      setMemberUnits(membersData.map(u => u.unit));
       setUnits(unitsData);
       setChannels(channelsData);
     } catch (err) {
@@ -204,32 +257,39 @@ export default function Admin({ currentUser }) {
   const handleBulkUpload = async () => {
     const lines = bulkData.trim().split('\n').filter(l => l.trim() && !l.toLowerCase().startsWith('username,'));
     if (!lines.length) { setError('No data'); return; }
-    let created = 0, errors = [];
+    let errors = [], rows = [];
     for (const line of lines) {
       const parts = line.includes('\t') ? line.split('\t') : line.split(',');
       if (parts.length < 4) { errors.push(`Invalid: ${line}`); continue; }
       const [username, firstName, lastName, email, role, position, unit, patrol, phone, age, gender, emergencyContactName, emergencyContactPhone] = parts.map(p => p.trim());
-      const userRole = role || 'youth';
+      // Passwords are left out so the server applies the role's default
+      rows.push({
+        username: username || null,
+        firstName,
+        lastName,
+        email,
+        phone: phone || null,
+        age: age ? parseInt(age) : null,
+        gender: gender || null,
+        role: role || 'youth',
+        position: position || null,
+        unit: unit || null,
+        patrol: patrol || null,
+        emergencyContactName: emergencyContactName || null,
+        emergencyContactPhone: emergencyContactPhone || null
+      });
+    }
+    let created = 0;
+    if (rows.length) {
       try {
-        await api.createUser({
-          username: username || null,
-          firstName,
-          lastName,
-          email,
-          phone: phone || null,
-          age: age ? parseInt(age) : null,
-          gender: gender || null,
-          role: userRole,
-          position: position || null,
-          unit: unit || null,
-          patrol: patrol || null,
-          emergencyContactName: emergencyContactName || null,
-          emergencyContactPhone: emergencyContactPhone || null,
-          password: getDefaultPassword(userRole)
+        const report = await api.importUsers(rows);
+        created = report.created;
+        report.results.filter(r => r.status === 'error').forEach(r => {
+          const row = rows[r.row - 1];
+          errors.push(`${row.username || row.email}: ${r.error}`);
         });
-        created++;
       } catch (err) {
-        errors.push(`${username || email}: ${err.message}`);
+        errors.push(err.message);
       }
     }
     await fetchData();
@@ -251,16 +311,28 @@ bob.p,Bob,Parent,bob@email.com,parent,Parent/Guardian,Troop 123,,555-456-7890,42
     a.click();
   };
 
-  const copyEmailList = () => {
-    const emails = filteredUsers.map(u => u.email).join(', ');
-    navigator.clipboard.writeText(emails);
-    setCopied(true);
-    setTimeout(() => setCopied(false), 2000);
+  // Copy and export cover every match, not just the pages loaded so far
+  const copyEmailList = async () => {
+    try {
+      const matches = await api.getAllUsers({ ...userFilters(), fields: ['email'] });
+      await navigator.clipboard.writeText(matches.map(u => u.email).join(', '));
+      setCopied(true);
+      setTimeout(() => setCopied(false), 2000);
+    } catch (err) {
+      setError(err.message || 'Failed to copy emails');
+    }
   };
 
-  const exportRoster = () => {
+  const exportRoster = async () => {
+    let matches;
+    try {
+      matches = await api.getAllUsers({ ...userFilters(), fields: EXPORT_FIELDS });
+    } catch (err) {
+      setError(err.message || 'Failed to export roster');
+      return;
+    }
     const csv = ['Username,First Name,Last Name,Email,Role,Position,Unit,Patrol,Phone,Age,Gender,Emergency Contact,Emergency Phone',
-      ...filteredUsers.map(u => 
+      ...matches.map(u => 
         `"${u.username || ''}","${u.firstName}","${u.lastName}","${u.email}","${u.role}","${u.position || ''}","${u.unit || ''}","${u.patrol || ''}","${u.phone || ''}","${u.age || ''}","${u.gender || ''}","${u.emergencyContactName || ''}","${u.emergencyContactPhone || ''}"`
       )
     ].join('\n');
@@ -270,19 +342,18 @@ bob.p,Bob,Parent,bob@email.com,parent,Parent/Guardian,Troop 123,,555-456-7890,42
     a.click();
   };
 
-  const allUnits = [...new Set(users.map(u => u.unit).filter(Boolean))];
-
-  const filteredUsers = users.filter(u => {
-    const searchLower = searchQuery.toLowerCase();
-    const matchSearch = 
-      (u.firstName?.toLowerCase() || '').includes(searchLower) ||
-      (u.lastName?.toLowerCase() || '').includes(searchLower) ||
-      (u.email?.toLowerCase() || '').includes(searchLower) ||
-      (u.username?.toLowerCase() || '').includes(searchLower);
-    const matchRole = roleFilter === 'all' || u.role === roleFilter;
-    const matchUnit = unitFilter === 'all' || u.unit === unitFilter;
-    return matchSearch && matchRole && matchUnit;
-  });
+  const unitCounts = memberUnits.reduce((counts, unit) => {
+    if (unit) counts[unit] = (counts[unit] || 0) + 1;
+    return counts;
+  }, {});
+  const allUnits = Object.keys(unitCounts);
+  const shownCount = `${users.length}${nextCursor ? '+' : ''}`;
+
+  const loadMoreButton = nextCursor && (
+    <button onClick={loadMoreUsers} disabled={loadingMore} style={{ width: '100%', marginTop: 12, padding: '12px 16px', background: '#F3F4F6', border: 'none', borderRadius: 10, cursor: loadingMore ? 'default' : 'pointer', fontSize: 13, fontWeight: 500, color: '#374151' }}>
+      {loadingMore ? 'Loading...' : 'Load more'}
+    </button>
+  );
 
   const getRoleBadge = (role) => ({
     admin: { label: 'Admin', color: '#DC2626', bg: '#FEE2E2' },
@@ -317,7 +388,7 @@ bob.p,Bob,Parent,bob@email.com,parent,Parent/Guardian,Troop 123,,555-456-7890,42
         </div>
         <div>
           <h1 style={{ fontSize: 22, fontWeight: 700, margin: 0 }}>Admin Panel</h1>
-          <p style={{ fontSize: 14, color: '#6b7280', margin: 0 }}>{users.length} registered users</p>
+          <p style={{ fontSize: 14, color: '#6b7280', margin: 0 }}>{memberUnits.length} registered users</p>
         </div>
       </div>
 
@@ -425,7 +496,7 @@ bob.p,Bob,Parent,bob@email.com,parent,Parent/Guardian,Troop 123,,555-456-7890,42
             <Download size={16} />Export CSV
           </button>
           <div style={{ flex: 1 }} />
-          <span style={{ fontSize: 13, color: '#6b7280', alignSelf: 'center' }}>{filteredUsers.length} people</span>
+          <span style={{ fontSize: 13, color: '#6b7280', alignSelf: 'center' }}>{shownCount} people</span>
         </div>
 
         {/* Roster Table */}
@@ -446,7 +517,7 @@ bob.p,Bob,Parent,bob@email.com,parent,Parent/Guardian,Troop 123,,555-456-7890,42
                 </tr>
               </thead>
               <tbody>
-                {filteredUsers.map((user, idx) => {
+                {users.map((user, idx) => {
                   const badge = getRoleBadge(user.role);
                   const isExpanded = expandedUser === user.id;
                   return (
@@ -486,10 +557,11 @@ bob.p,Bob,Parent,bob@email.com,parent,Parent/Guardian,Troop 123,,555-456-7890,42
               </tbody>
             </table>
           </div>
-          {filteredUsers.length === 0 && (
+          {users.length === 0 && (
             <div style={{ padding: 40, textAlign: 'center', color: '#9ca3af' }}>No users found</div>
           )}
         </div>
+        {loadMoreButton}
       </>}
 
       {/* USERS TAB */}
@@ -515,7 +587,7 @@ bob.p,Bob,Parent,bob@email.com,parent,Parent/Guardian,Troop 123,,555-456-7890,42
         </div>
 
         <div style={{ display: 'flex', flexDirection: 'column', gap: 12 }}>
-          {filteredUsers.map(user => {
+          {users.map(user => {
             const badge = getRoleBadge(user.role);
             const isMe = user.id === currentUser?.id;
             return (
@@ -542,6 +614,7 @@ bob.p,Bob,Parent,bob@email.com,parent,Parent/Guardian,Troop 123,,555-456-7890,42
             );
           })}
         </div>
+        {loadMoreButton}
       </>}
 
       {/* UNITS TAB */}
@@ -560,7 +633,7 @@ bob.p,Bob,Parent,bob@email.com,parent,Parent/Guardian,Troop 123,,555-456-7890,42
               <div style={{ width: 48, height: 48, borderRadius: 12, background: 'linear-gradient(135deg, #06B6D4, #22D3EE)', display: 'flex', alignItems: 'center', justifyContent: 'center', fontSize: 24 }}>🏕️</div>
               <div style={{ flex: 1 }}>
                 <div style={{ fontWeight: 600, fontSize: 16 }}>{unit.name}</div>
-                <div style={{ fontSize: 13, color: '#6b7280' }}>{users.filter(u => u.unit === unit.name).length} members</div>
+                <div style={{ fontSize: 13, color: '#6b7280' }}>{unitCounts[unit.name] || 0} members</div>
               </div>
               <div style={{ display: 'flex', gap: 8 }}>
                 <button onClick={() => { setEditingUnit(unit); setUnitFormData({ name: unit.name }); setShowUnitModal(true); }} style={{ width: 36, height: 36, borderRadius: 8, border: 'none', background: '#EDE9FE', cursor: 'pointer', display: 'flex', alignItems: 'center', justifyContent: 'center', color: '#7C3AED' }}><Edit2 size={16} /></button>
@@ -3,6 +3,9 @@ import { useState, useEffect, useRef } from 'react';
 import { ChevronLeft, Send, Pin, RefreshCw, Image, X, Loader2 } from 'lucide-react';
 import * as api from '../lib/api';
 
+const PAGE_SIZE = 50;
+const STREAM_RETRY_MS = 30000;
+
 export default function MessageView({ channel, currentUser, onBack }) {
   const [messages, setMessages] = useState([]);
   const [newMessage, setNewMessage] = useState('');
@@ -13,44 +16,167 @@ export default function MessageView({ channel, currentUser, onBack }) {
   const [imagePreview, setImagePreview] = useState(null);
   const [uploading, setUploading] = useState(false);
   const [viewingImage, setViewingImage] = useState(null);
+  const [hasOlder, setHasOlder] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const messagesEndRef = useRef(null);
   const pollIntervalRef = useRef(null);
+  const streamRef = useRef(null);
   const fileInputRef = useRef(null);
+  const lastIdRef = useRef(null);
 
-  // Fetch messages when channel changes
+  // Fetch messages when channel changes, then follow the live stream
   useEffect(() => {
     if (channel) {
-      fetchMessages();
-      
-      // Poll for new messages every 10 seconds
-      pollIntervalRef.current = setInterval(fetchMessages, 10000);
+      let cancelled = false;
+      lastIdRef.current = null;
+      setMessages([]);
+
+      let retryTimer = null;
+
+      const startPolling = () => {
+        if (!pollIntervalRef.current) {
+          pollIntervalRef.current = setInterval(fetchNewMessages, 10000);
+        }
+      };
+
+      const stopPolling = () => {
+        if (pollIntervalRef.current) {
+          clearInterval(pollIntervalRef.current);
+          pollIntervalRef.current = null;
+        }
+      };
+
+      // Poll meanwhile, and try the stream again later (the server may be at
+      // its stream limit, or the connection dropped)
+      const retryLater = () => {
+        startPolling();
+        retryTimer = setTimeout(() => connect(lastIdRef.current), STREAM_RETRY_MS);
+      };
+
+      // Each connection needs a fresh stream token, which the browser's own
+      // reconnect wouldn't have, so reconnects are handled here
+      const connect = async (sinceId) => {
+        let token;
+        try {
+          token = await api.getStreamToken(channel.id);
+        } catch (err) {
+          if (!cancelled) retryLater();
+          return;
+        }
+        if (cancelled) return;
+        const stream = api.openMessageStream(channel.id, token, sinceId);
+        stream.onopen = stopPolling;
+        stream.addEventListener('message', (e) => {
+          appendMessages([JSON.parse(e.data)]);
+        });
+        stream.addEventListener('reconnect', () => {
+          stream.close();
+          connect(lastIdRef.current);
+        });
+        stream.onerror = () => {
+          stream.close();
+          if (!cancelled) retryLater();
+        };
+        streamRef.current = stream;
+      };
+
+      fetchMessages().then((lastId) => {
+        if (cancelled) return;
+        if (!window.EventSource) {
+          startPolling();
+          return;
+        }
+        // lastIdRef only catches up after the render; resume from the page we just fetched
+        connect(lastId);
+      });
       
       return () => {
+        cancelled = true;
+        clearTimeout(retryTimer);
+        if (streamRef.current) {
+          streamRef.current.close();
+          streamRef.current = null;
+        }
         if (pollIntervalRef.current) {
           clearInterval(pollIntervalRef.current);
+          pollIntervalRef.current = null;
         }
       };
     }
   }, [channel?.id]);
 
-  // Scroll to bottom when messages change
+  // Scroll to bottom when new messages arrive (not when loading older ones)
   useEffect(() => {
-    scrollToBottom();
+    const last = messages[messages.length - 1];
+    if (last && last.id !== lastIdRef.current) {
+      lastIdRef.current = last.id;
+      scrollToBottom();
+    }
   }, [messages]);
 
+  const appendMessages = (newOnes) => {
+    if (newOnes.length === 0) return;
+    setMessages(prev => {
+      const seen = new Set(prev.map(m => m.id));
+      return [...prev, ...newOnes.filter(m => !seen.has(m.id))];
+    });
+  };
+
+  // Initial load: the most recent page only; resolves to its newest id
   const fetchMessages = async () => {
-    if (!channel) return;
+    if (!channel) return null;
     
     try {
-      const data = await api.getMessages(channel.id);
+      const data = await api.getMessages(channel.id, { limit: PAGE_SIZE });
       setMessages(data);
+      setHasOlder(data.length === PAGE_SIZE);
       setError('');
+      return data.length ? data[data.length - 1].id : null;
     } catch (err) {
       console.error('Failed to fetch messages:', err);
       setError('Failed to load messages');
     }
   };
 
+  // Poll: only messages newer than the last one we have
+  const fetchNewMessages = async () => {
+    if (!channel) return;
+    
+    try {
+      let sinceId = lastIdRef.current;
+      if (sinceId == null) {
+        await fetchMessages();
+        return;
+      }
+      let data;
+      do {
+        data = await api.getMessages(channel.id, { sinceId, limit: PAGE_SIZE });
+        appendMessages(data);
+        if (data.length) sinceId = data[data.length - 1].id;
+      } while (data.length === PAGE_SIZE);
+      setError('');
+    } catch (err) {
+      console.error('Failed to fetch messages:', err);
+      setError('Failed to load messages');
+    }
+  };
+
+  const fetchOlderMessages = async () => {
+    if (!channel || messages.length === 0 || loadingOlder) return;
+    
+    setLoadingOlder(true);
+    try {
+      const data = await api.getMessages(channel.id, { beforeId: messages[0].id, limit: PAGE_SIZE });
+      setMessages(prev => [...data, ...prev]);
+      setHasOlder(data.length === PAGE_SIZE);
+    } catch (err) {
+      console.error('Failed to fetch older messages:', err);
+      setError('Failed to load older messages');
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
@@ -105,7 +231,7 @@ export default function MessageView({ channel, currentUser, onBack }) {
 
       // Post message with optional image
       const message = await api.postMessage(channel.id, newMessage.trim(), imageUrl);
-      setMessages(prev => [...prev, message]);
+      appendMessages([message]);
       setNewMessage('');
       clearImage();
       setError('');
@@ -127,8 +253,8 @@ export default function MessageView({ channel, currentUser, onBack }) {
 
   const handleTogglePin = async (messageId) => {
     try {
-      await api.togglePinMessage(messageId);
-      fetchMessages();
+      const { pinned } = await api.togglePinMessage(messageId);
+      setMessages(prev => prev.map(m => m.id === messageId ? { ...m, pinned } : m));
     } catch (err) {
       console.error('Failed to toggle pin:', err);
     }
@@ -242,7 +368,7 @@ export default function MessageView({ channel, currentUser, onBack }) {
           )}
         </div>
         <button
-          onClick={fetchMessages}
+          onClick={fetchNewMessages}
           style={{
             background: 'none',
             border: 'none',
@@ -276,6 +402,25 @@ export default function MessageView({ channel, currentUser, onBack }) {
         overflow: 'auto',
         padding: '16px'
       }}>
+        {hasOlder && (
+          <div style={{ textAlign: 'center', marginBottom: '12px' }}>
+            <button
+              onClick={fetchOlderMessages}
+              disabled={loadingOlder}
+              style={{
+                background: 'white',
+                border: '1px solid #e5e7eb',
+                borderRadius: '16px',
+                padding: '6px 14px',
+                fontSize: '13px',
+                color: '#7C3AED',
+                cursor: loadingOlder ? 'default' : 'pointer'
+              }}
+            >
+              {loadingOlder ? 'Loading...' : 'Load earlier messages'}
+            </button>
+          </div>
+        )}
         {messages.length === 0 ? (
           <div style={{
             textAlign: 'center',
@@ -367,7 +512,7 @@ export default function MessageView({ channel, currentUser, onBack }) {
                   {/* Image */}
                   {message.imageUrl && (
                     <img 
-                      src={message.imageUrl} 
+                      src={message.thumbnailUrl || message.imageUrl} 
                       alt="Shared image"
                       onClick={() => setViewingImage(message.imageUrl)}
                       style={{
@@ -108,8 +108,38 @@ export async function updateChannel(channelId, data) {
 // MESSAGES
 // ==========================================
 
-export async function getMessages(channelId) {
-  return apiRequest(`/api/channels/${channelId}/messages`);
+// params: { sinceId, beforeId, limit } - all optional; no params returns full history
+export async function getMessages(channelId, params = {}) {
+  const query = new URLSearchParams();
+  if (params.sinceId != null) query.set('since_id', params.sinceId);
+  if (params.beforeId != null) query.set('before_id', params.beforeId);
+  if (params.limit != null) query.set('limit', params.limit);
+  const qs = query.toString();
+  return apiRequest(`/api/channels/${channelId}/messages${qs ? `?${qs}` : ''}`);
+}
+
+// Ranked search over channels the user can see; each hit has a snippet with
+// matches wrapped in <mark> (the rest of the text is HTML-escaped)
+export async function searchMessages(q, params = {}) {
+  const query = new URLSearchParams({ q });
+  if (params.channelId) query.set('channel_id', params.channelId);
+  if (params.limit != null) query.set('limit', params.limit);
+  return apiRequest(`/api/search?${query}`);
+}
+
+// Short-lived token for one channel's stream (see openMessageStream)
+export async function getStreamToken(channelId) {
+  const data = await apiRequest(`/api/channels/${channelId}/stream-token`, { method: 'POST' });
+  return data.token;
+}
+
+// Server-Sent Events stream of new messages. EventSource can't send headers,
+// so a stream token from getStreamToken goes in the query string; it only
+// opens this one stream, and only for a minute, so it is safe in logs
+export function openMessageStream(channelId, streamToken, sinceId = null) {
+  const query = new URLSearchParams({ token: streamToken });
+  if (sinceId != null) query.set('since_id', sinceId);
+  return new EventSource(`${API_BASE}/api/channels/${channelId}/stream?${query}`);
 }
 
 export async function postMessage(channelId, content, imageUrl = null) {
@@ -147,8 +177,15 @@ export async function togglePinMessage(messageId) {
 // ADMIN - USERS
 // ==========================================
 
-export async function getAllUsers() {
-  return apiRequest('/api/admin/users');
+// params: { role, unit, patrol, active, q, fields, limit, cursor }. With limit
+// the result is { users, nextCursor }; without it, a plain array.
+export async function getAllUsers(params = {}) {
+  const query = new URLSearchParams();
+  for (const [key, value] of Object.entries(params)) {
+    if (value != null && value !== '') query.set(key, Array.isArray(value) ? value.join(',') : value);
+  }
+  const qs = query.toString();
+  return apiRequest(`/api/admin/users${qs ? `?${qs}` : ''}`);
 }
 
 export async function createUser(userData) {
@@ -158,6 +195,14 @@ export async function createUser(userData) {
   });
 }
 
+// Create many users in one request; returns { created, failed, results: [{ row, status, error }] }
+export async function importUsers(users) {
+  return apiRequest('/api/admin/users/import', {
+    method: 'POST',
+    body: JSON.stringify({ users })
+  });
+}
+
 export async function updateUser(userId, userData) {
   return apiRequest(`/api/admin/users/${userId}`, {
     method: 'PUT',